@@ -0,0 +1,110 @@
+"""Animation timelines: per-frame durations, playback modes, frame events and root motion, compiled into flat tuples."""
+
+LOOP = "loop"  # Back to the first frame after the last
+ONCE = "once"  # Holds the last frame; the timeline reports it finished
+PING_PONG = "ping_pong"  # Plays forwards, then backwards, and repeats
+END = -1  # next[] of a ONCE animation's last entry
+
+FRAME_DURATION = 100  # Milliseconds a frame lasts unless its animation says otherwise
+JUMP_MOVE_X = 50  # Horizontal distance covered by one jump
+JUMP_AIRBORNE = range(3, 8)  # Jump frames with the feet off the ground
+
+# state -> {"mode", "durations" (ms per frame), "events" ({frame: name}, fired on entering
+# the frame), "root_motion" (pixels moved forward over each frame)}; all keys optional
+ANIMATIONS = {
+    "jump": {
+        "mode": ONCE,
+        # Quick wind-up, hang at the top of the arc, quick recovery; the same second as ten even frames
+        "durations": (80, 80, 80, 100, 120, 140, 120, 100, 100, 80),
+        "events": {JUMP_AIRBORNE.start: "takeoff", JUMP_AIRBORNE.stop: "land"},
+        "root_motion": tuple(JUMP_MOVE_X / len(JUMP_AIRBORNE) if frame in JUMP_AIRBORNE else 0 for frame in range(10)),
+    },
+}
+
+
+class Timeline:
+    """Every state's animation flattened into parallel tuples indexed by entry.
+
+    `start[state]` is the state's first entry and `length[state]` its number of entries. For
+    entry i, `state[i]` is the state it belongs to, `frame[i]` the sheet frame
+    to show, `duration[i]` how many simulation steps it lasts, `velocity[i]` its root motion
+    in pixels per step, `event[i]` the event fired on entering it (or None) and `next[i]`
+    the entry that follows, or END. `steps_per_frame` is how many simulation steps make
+    FRAME_DURATION, as in dog_core.Dog.
+    """
+
+    def __init__(self, frame_counts, steps_per_frame=1, animations=ANIMATIONS):
+        self.start = {}
+        self.length = {}
+        states, frames, durations, velocities, events, following = [], [], [], [], [], []
+        for state, count in frame_counts.items():
+            animation = animations.get(state, {})
+            mode = animation.get("mode", LOOP)
+            state_durations = animation.get("durations", (FRAME_DURATION,) * count)
+            state_motion = animation.get("root_motion", (0,) * count)
+            state_events = animation.get("events", {})
+            if len(state_durations) != count or len(state_motion) != count:
+                raise ValueError(f"Animation {state!r} must time and move each of its {count} frames")
+            if min(state_durations) <= 0:
+                raise ValueError(f"Animation {state!r} has a frame that lasts no time")
+
+            sequence = list(range(count))
+            if mode == PING_PONG:
+                sequence += sequence[-2:0:-1]
+            elif mode not in (LOOP, ONCE):
+                raise ValueError(f"Unknown animation mode {mode!r} for {state!r}")
+
+            first = self.start[state] = len(frames)
+            self.length[state] = len(sequence)
+            for position, frame in enumerate(sequence):
+                states.append(state)
+                duration = state_durations[frame] / FRAME_DURATION * steps_per_frame
+                frames.append(frame)
+                durations.append(duration)
+                velocities.append(state_motion[frame] / duration)
+                events.append(state_events.get(frame))
+                following.append(first + position + 1)
+            following[-1] = END if mode == ONCE else first
+
+        self.state = tuple(states)
+        self.frame = tuple(frames)
+        self.duration = tuple(durations)
+        self.velocity = tuple(velocities)
+        self.event = tuple(events)
+        self.next = tuple(following)
+
+    def advance(self, entry, phase, steps, fired):
+        """Play `steps` steps on from `phase` steps into `entry`.
+
+        Returns (entry, phase, root motion covered, finished), and appends the events of the
+        entries entered to `fired`. A finished ONCE animation stays on its last entry.
+        """
+        duration = self.duration
+        velocity = self.velocity
+        motion = 0.0
+        while True:
+            left = duration[entry] - phase
+            if steps < left:
+                return entry, phase + steps, motion + velocity[entry] * steps, False
+            motion += velocity[entry] * left
+            steps -= left
+            following = self.next[entry]
+            if following == END:
+                return entry, duration[entry], motion, True
+            entry = following
+            phase = 0.0
+            event = self.event[entry]
+            if event is not None:
+                fired.append(event)
+
+
+_timelines = {}
+
+
+def timeline_for(frame_counts, steps_per_frame=1):
+    """Return the Timeline of ANIMATIONS for these frame counts, compiled once and shared by every dog."""
+    key = (tuple(frame_counts.items()), steps_per_frame)
+    timeline = _timelines.get(key)
+    if timeline is None:
+        timeline = _timelines[key] = Timeline(frame_counts, steps_per_frame)
+    return timeline
@@ -4,7 +4,13 @@ import sys
 import arcade
 import time
 
-from build_hat_controller import lego_build_hat_input
+from game_clock import FixedTimestepClock, lerp
+from input_events import InputEventQueue, Jump, SteerChanged, Stop
+from input_backends import create_input, input_spec
+from dog_core import Dog
+from animation import FRAME_DURATION
+import sprite_loader
+from sprite_loader import STATES_COLUMNS
 
 os.environ["DISPLAY"] = ":0" # todo only RPI
 
@@ -18,66 +24,51 @@ SPRITE_HEIGHT = 64  # Update to match your sprite's height
 ROWS = 8
 INITIAL_POSITION_X = SCREEN_WIDTH // 4 - 150  # Initial X position
 INITIAL_POSITION_Y = SCREEN_HEIGHT // 4 - 50 # Initial Y position
-JUMP_MOVE_X = 50  # Horizontal movement during jump
-first_col_width = 100
-states_columns = {
-    "jump": 11,
-    "idle1": 5,
-    "idle2": 5,
-    "sit": 9,
-    "walk": 5,
-    "run": 8,
-    "sniff": 8,
-    "sniff_walk": 8,
+FIXED_STEP = 1 / 60  # Seconds of game time per simulation step
+TEXTURE_STEPS = round(FRAME_DURATION / 1000 / FIXED_STEP)  # Simulation steps per animation frame of default length
+WALK_SPEED = 2  # Pixels per simulation step
+KEY_ACTIONS = {
+    arcade.key.SPACE: "jump",
+    arcade.key.LEFT: "left",
+    arcade.key.RIGHT: "right",
 }
-FRAME_DELAY = 0.1  # Time in seconds between frame changes
 
 def load_textures_by_state(sprite_sheet_path, sprite_width, sprite_height, rows):
     textures_by_state = {}
 
     # Validate that the number of states matches the number of rows
-    if len(states_columns) != rows:
+    if len(STATES_COLUMNS) != rows:
         raise ValueError("The number of states must match the number of rows in the sprite sheet.")
 
-    # Iterate through rows and columns, assign textures to states
-    row = 0
-    for state, columns in states_columns.items():
+    # Frames are sliced and mirrored once by sprite_loader and read back from its cache,
+    # instead of arcade.load_texture decoding the PNG region twice per frame
+    sheet = sprite_loader.load_sheet(sprite_sheet_path, STATES_COLUMNS, sprite_width, sprite_height)
+    for state, frame_count in sheet.frame_counts.items():
         textures = []
-        for col in range(1, columns):  # Start from column 1 to skip the first column
-            x = first_col_width + (col - 1) * sprite_width  # Account for wider first column
-            y = row * sprite_height
-            texture = arcade.load_texture(sprite_sheet_path, x, y, sprite_width, sprite_height)
-            mirror_texture = arcade.load_texture(sprite_sheet_path, x, y, sprite_width, sprite_height, mirrored=True)
+        for frame in range(frame_count):
+            name = f"{sprite_sheet_path}:{state}:{frame}"
+            texture = sprite_loader.to_arcade_texture(name, sheet.frames[(state, frame, "right", 1.0)])
+            mirror_texture = sprite_loader.to_arcade_texture(name + ":mirrored", sheet.frames[(state, frame, "left", 1.0)])
             textures.append((texture, mirror_texture))
-        row += 1
         textures_by_state[state] = textures
 
     return textures_by_state
 
 
-class SpriteData:
-    def __init__(self, initial_frame, length, textures):
-        self.current_frame = initial_frame
-        self.length = length
-        self.textures = textures
-
-
 class DogSpriteDemo(arcade.Window):
-    def __init__(self, is_mac):
+    def __init__(self, input_backend):
         super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
-        self.is_mac = is_mac
+        # A motor-driven input_backends backend, or None to steer with arcade's own key events
+        self.input = input_backend
+        self.is_mac = input_backend is None
         self.textures_by_state_name = None
         self.dog_sprite_list = None  # SpriteList for the dog sprite
         self.dog_sprite = None  # The animated sprite
-        self.sprite_data = None
-        self.is_jumping = False
-        self.jump_frames_remaining = 0
-        self.is_walking = False
-        self.facing_right = True
+        self.dog = None  # dog_core.Dog; the sprite's center_x is only the interpolated render position
+        self.shown = None  # (state, frame, facing_right) the sprite's texture currently shows
         self.background_texture = None
-        self.start_jump_x = None
-        self.jump_increment_x = None
-        self.start_jump_y = None
+        self.game_clock = FixedTimestepClock(FIXED_STEP)
+        self.input_events = InputEventQueue()
 
     def setup(self):
         """Set up the game and initialize variables."""
@@ -95,102 +86,62 @@ class DogSpriteDemo(arcade.Window):
             ROWS,
         )
 
-        # Initialize the dog in the sit state
-        self.sit()
-
-        # Schedule the animation update
-        arcade.schedule(self.update_texture, FRAME_DELAY)
-
-    def sit(self):
-        current_textures = self.textures_by_state_name["sit"]
-        self.sprite_data = SpriteData(0, len(current_textures), current_textures)
-
-        current_x = self.dog_sprite.center_x if self.dog_sprite else INITIAL_POSITION_X
-        current_y = self.dog_sprite.center_y if self.dog_sprite else INITIAL_POSITION_Y
-
-        # Create the dog sprite
-        self.dog_sprite_list = arcade.SpriteList()
-        self.dog_sprite = arcade.Sprite(scale=SPRITE_SCALING)
-        self.dog_sprite.texture = self.sprite_data.textures[self.sprite_data.current_frame][
-            0 if self.facing_right else 1]
-        self.dog_sprite.center_x = current_x  # Retain the X position
-        self.dog_sprite.center_y = current_y  # Retain the Y position
-
-        self.dog_sprite_list.append(self.dog_sprite)
-        self.is_walking = False
-
-    def jump(self):
-        current_textures = self.textures_by_state_name["jump"]
-        total_frames = len(current_textures)
-
-        self.sprite_data = SpriteData(0, total_frames, current_textures)
-
-        # Retain the current position of the dog
-        self.start_jump_x = self.dog_sprite.center_x if self.dog_sprite else INITIAL_POSITION_X
-        self.start_jump_y = self.dog_sprite.center_y if self.dog_sprite else INITIAL_POSITION_Y
-
-        # Calculate incremental movement per frame
-        self.jump_increment_x = JUMP_MOVE_X / total_frames * (1 if self.facing_right else -1)
-
-        # Initialize jump animation
+        # The sprite and its list live for the whole game; state changes only swap textures.
+        # Every corgi texture goes into the list's atlas now, so nothing is uploaded mid-game.
         self.dog_sprite_list = arcade.SpriteList()
+        self.dog_sprite_list.preload_textures([
+            texture
+            for textures in self.textures_by_state_name.values()
+            for pair in textures
+            for texture in pair
+        ])
         self.dog_sprite = arcade.Sprite(scale=SPRITE_SCALING)
-        self.dog_sprite.texture = self.sprite_data.textures[self.sprite_data.current_frame][
-            0 if self.facing_right else 1]
-
-        # Set the position to the current position, ensuring center_y is unchanged
-        self.dog_sprite.center_x = self.start_jump_x
-        self.dog_sprite.center_y = self.start_jump_y
-
+        self.dog_sprite.center_x = INITIAL_POSITION_X
+        self.dog_sprite.center_y = INITIAL_POSITION_Y
         self.dog_sprite_list.append(self.dog_sprite)
-        self.is_jumping = True
-        self.jump_frames_remaining = total_frames
 
-    def walk(self, direction):
-        current_textures = self.textures_by_state_name["walk"]
-        self.sprite_data = SpriteData(0, len(current_textures), current_textures)
+        frame_counts = {state: len(textures) for state, textures in self.textures_by_state_name.items()}
+        width = SPRITE_WIDTH * SPRITE_SCALING
+        # The core tracks the left edge; arcade positions sprites by their center
+        self.dog = Dog(frame_counts, INITIAL_POSITION_X - width / 2, width, SCREEN_WIDTH, steps_per_frame=TEXTURE_STEPS)
+        self.show_current_texture()
 
-        self.facing_right = direction == "right"
-        self.dog_sprite.texture = self.sprite_data.textures[self.sprite_data.current_frame][
-            0 if self.facing_right else 1]
+        # The motor pushes steering changes from the HAT scheduler thread; nothing is polled per frame
+        if self.input is not None:
+            self.input.add_listener(self.input_events.on_motor_state)
 
-        # Set movement direction
-        self.dog_sprite.change_x = 2 if self.facing_right else -2
-        self.is_walking = True
+    def show_current_texture(self):
+        dog = self.dog
+        shown = (dog.current_state, dog.current_frame, dog.facing_right)
+        if shown != self.shown:
+            self.shown = shown
+            self.dog_sprite.texture = self.textures_by_state_name[dog.current_state][dog.current_frame][
+                0 if dog.facing_right else 1]
 
     def update(self, delta_time):
         """Update game logic."""
-        if self.dog_sprite:
-            self.dog_sprite.center_x += self.dog_sprite.change_x
-        if not self.is_mac:  # Only for Build HAT (non-Mac version)
-            direction = lego_build_hat_input()  # Get the direction from the motor
-            if direction == "left":
-                self.walk("left")
-            elif direction == "right":
-                self.walk("right")
-
-    def update_texture(self, delta_time):
-        """Update the sprite texture every FRAME_DELAY seconds."""
-        if self.sprite_data:
-            # Update texture frame
-            self.sprite_data.current_frame = (
-                                                     self.sprite_data.current_frame + 1
-                                             ) % self.sprite_data.length
-            self.dog_sprite.texture = self.sprite_data.textures[self.sprite_data.current_frame][
-                0 if self.facing_right else 1]
-
-            # Smoothly move horizontally during the jump
-            if self.is_jumping:
-                self.dog_sprite.center_x += self.jump_increment_x
-
-        # Handle jump state completion
-        if self.is_jumping:
-            self.jump_frames_remaining -= 1
-            if self.jump_frames_remaining <= 0:
-                self.is_jumping = False
-                self.sit()
+        for event in self.input_events.drain():
+            self.handle_event(event)
+        self.game_clock.run_updates(self.step, delta_time)
+
+    def handle_event(self, event):
+        if isinstance(event, SteerChanged):
+            self.dog.walk_steady(event.direction, WALK_SPEED)
+        elif isinstance(event, Jump):
+            self.dog.jump()
+        elif isinstance(event, Stop):
+            self.dog.sit()
+
+    def step(self):
+        """Advance the simulation by one FIXED_STEP."""
+        self.dog.step()
+        self.show_current_texture()
 
     def on_draw(self):
+        self.game_clock.run_render(self.draw_frame)
+
+    def draw_frame(self, alpha):
+        self.dog_sprite.center_x = lerp(self.dog.prev_x, self.dog.x, alpha) + self.dog.width / 2
         arcade.start_render()
 
         # Draw the background image
@@ -202,33 +153,22 @@ class DogSpriteDemo(arcade.Window):
         self.dog_sprite_list.draw()
 
     def on_key_press(self, key, modifiers):
-        if self.is_mac:
-            if key == arcade.key.SPACE and not self.is_jumping:
-                self.jump()
-            elif key == arcade.key.LEFT:
-                self.walk("left")
-            elif key == arcade.key.RIGHT:
-                self.walk("right")
+        if self.is_mac and key in KEY_ACTIONS:
+            self.input_events.key_down(KEY_ACTIONS[key])
 
     def on_key_release(self, key, modifiers):
-        if self.is_mac:
-            if key in (arcade.key.LEFT, arcade.key.RIGHT):
-                self.dog_sprite.change_x = 0
-                self.is_walking = False
-
-                # Switch to the sit animation
-                self.sit()
-        else:
-            # Placeholder for Lego Build Hat controls
-            self.dog_sprite.change_x = 0
-            self.is_walking = False
-            self.sit()
+        if self.is_mac and key in KEY_ACTIONS:
+            self.input_events.key_up(KEY_ACTIONS[key])
 
 def main():
-    is_mac = '--mac' in sys.argv
-    dog = DogSpriteDemo(is_mac)
+    # The keyboard comes through arcade's window events, not the pygame keyboard backend
+    spec = input_spec(sys.argv)
+    input_backend = None if spec.partition(":")[0] == "keyboard" else create_input(spec)
+    dog = DogSpriteDemo(input_backend)
     dog.setup()
     arcade.run()
+    if input_backend is not None:
+        input_backend.stop()
 
 
 if __name__ == "__main__":
@@ -2,7 +2,15 @@ import os
 import sys
 import pygame
 import time
-from build_hat_controller import lego_build_hat_input
+from game_clock import FixedTimestepClock, lerp
+import sprite_loader
+from input_backends import create_input, input_spec
+from dog_core import Dog
+from animation import FRAME_DURATION
+import profiler
+from profiler import PROFILER
+from profiler_overlay import ProfilerOverlay
+from sprite_loader import STATES_COLUMNS
 
 # Constants
 SCREEN_WIDTH = 1280
@@ -14,19 +22,9 @@ SPRITE_HEIGHT = 64  # Update to match your sprite's height
 ROWS = 8
 INITIAL_POSITION_X = SCREEN_WIDTH // 4 - 150  # Initial X position
 INITIAL_POSITION_Y = SCREEN_HEIGHT // 4 - 50  # Initial Y position
-JUMP_MOVE_X = 50  # Horizontal movement during jump
-FIRST_COL_WIDTH = 100
-STATES_COLUMNS = {
-    "jump": 11,
-    "idle1": 5,
-    "idle2": 5,
-    "sit": 9,
-    "walk": 5,
-    "run": 8,
-    "sniff": 8,
-    "sniff_walk": 8,
-}
-FRAME_DELAY = 100  # Time in milliseconds between frame changes
+FIXED_STEP = 1 / 60  # Seconds of game time per simulation step
+TEXTURE_STEPS = round(FRAME_DURATION / 1000 / FIXED_STEP)  # Simulation steps per animation frame of default length
+WALK_SPEED = 2  # Pixels per simulation step
 
 
 def load_textures_by_state(sprite_sheet_path, sprite_width, sprite_height, rows):
@@ -36,52 +34,32 @@ def load_textures_by_state(sprite_sheet_path, sprite_width, sprite_height, rows)
     if len(STATES_COLUMNS) != rows:
         raise ValueError("The number of states must match the number of rows in the sprite sheet.")
 
-    # Load the sprite sheet
-    sprite_sheet = pygame.image.load(sprite_sheet_path).convert_alpha()
-
-    # Iterate through rows and columns, assign textures to states
-    row = 0
-    for state, columns in STATES_COLUMNS.items():
+    # Frames are sliced and mirrored once by sprite_loader and read back from its cache
+    sheet = sprite_loader.load_sheet(sprite_sheet_path, STATES_COLUMNS, sprite_width, sprite_height)
+    for state, frame_count in sheet.frame_counts.items():
         textures = []
-        for col in range(1, columns):  # Start from column 1 to skip the first column
-            x = FIRST_COL_WIDTH + (col - 1) * sprite_width  # Account for wider first column
-            y = row * sprite_height
-            texture = sprite_sheet.subsurface(pygame.Rect(x, y, sprite_width, sprite_height))
-            mirror_texture = pygame.transform.flip(texture, True, False)
+        for frame in range(frame_count):
+            texture = sprite_loader.to_pygame_surface(sheet.frames[(state, frame, "right", 1.0)])
+            mirror_texture = sprite_loader.to_pygame_surface(sheet.frames[(state, frame, "left", 1.0)])
             textures.append((texture, mirror_texture))
-        row += 1
         textures_by_state[state] = textures
 
     return textures_by_state
 
 
-class SpriteData:
-    def __init__(self, initial_frame, length, textures):
-        self.current_frame = initial_frame
-        self.length = length
-        self.textures = textures
-
-
 class DogSpriteDemo:
-    def __init__(self, is_mac):
+    def __init__(self, input_backend, show_profile=False):
         pygame.init()
-        self.is_mac = is_mac
+        self.input = input_backend
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption(SCREEN_TITLE)
         self.clock = pygame.time.Clock()
+        self.game_clock = FixedTimestepClock(FIXED_STEP)
         self.textures_by_state_name = None
-        self.dog_sprite = None  # The animated sprite
-        self.sprite_data = None
-        self.is_jumping = False
-        self.jump_frames_remaining = 0
-        self.is_walking = False
-        self.facing_right = True
+        self.dog = None  # dog_core.Dog, created once the textures tell us the animations' lengths
         self.background_texture = None
-        self.start_jump_x = None
-        self.jump_increment_x = None
-        self.start_jump_y = None
-        self.current_x = INITIAL_POSITION_X
         self.current_y = INITIAL_POSITION_Y
+        self.overlay = ProfilerOverlay(visible=show_profile)
 
     def setup(self):
         # Load the background
@@ -96,116 +74,68 @@ class DogSpriteDemo:
             ROWS,
         )
 
-        # Initialize the dog in the sit state
-        self.sit()
-
-    def sit(self):
-        current_textures = self.textures_by_state_name["sit"]
-        self.sprite_data = SpriteData(0, len(current_textures), current_textures)
-        self.is_walking = False
-
-    def jump(self):
-        current_textures = self.textures_by_state_name["jump"]
-        total_frames = len(current_textures)
-
-        self.sprite_data = SpriteData(0, total_frames, current_textures)
-
-        # Retain the current position of the dog
-        self.start_jump_x = self.current_x
-        self.start_jump_y = self.current_y
-
-        # Calculate incremental movement per frame
-        self.jump_increment_x = JUMP_MOVE_X / total_frames * (1 if self.facing_right else -1)
+        frame_counts = {state: len(textures) for state, textures in self.textures_by_state_name.items()}
+        self.dog = Dog(frame_counts, INITIAL_POSITION_X, SPRITE_WIDTH, SCREEN_WIDTH, steps_per_frame=TEXTURE_STEPS)
 
-        self.is_jumping = True
-        self.jump_frames_remaining = total_frames
+    def step(self):
+        # One fixed simulation step: movement, then animation
+        self.dog.step()
 
-    def walk(self, direction):
-        current_textures = self.textures_by_state_name["walk"]
-        self.sprite_data = SpriteData(0, len(current_textures), current_textures)
+    def draw(self, alpha=1.0):
+        with PROFILER.scope("draw"):
+            # Draw the background
+            self.screen.blit(self.background_texture, (0, 0))
 
-        self.facing_right = direction == "right"
-        self.is_walking = True
-
-    def update(self):
-        # Smoothly move horizontally during the jump
-        if self.is_jumping:
-            self.current_x += self.jump_increment_x
-
-        # Handle jump state completion
-        if self.is_jumping:
-            self.jump_frames_remaining -= 1
-            if self.jump_frames_remaining <= 0:
-                self.is_jumping = False
-                self.sit()
-
-        # Handle walking
-        if self.is_walking:
-            self.current_x += 2 if self.facing_right else -2
-
-    def update_texture(self):
-        if self.sprite_data:
-            # Update texture frame
-            self.sprite_data.current_frame = (
-                self.sprite_data.current_frame + 1
-            ) % self.sprite_data.length
-
-    def draw(self):
-        # Draw the background
-        self.screen.blit(self.background_texture, (0, 0))
+            # Draw the dog sprite
+            dog = self.dog
+            texture = self.textures_by_state_name[dog.current_state][dog.current_frame][0 if dog.facing_right else 1]
+            self.screen.blit(texture, (lerp(dog.prev_x, dog.x, alpha), self.current_y))
+            self.overlay.draw(self.screen)
+        with PROFILER.scope("flip"):
+            pygame.display.flip()
 
-        # Draw the dog sprite
-        if self.sprite_data:
-            texture = self.sprite_data.textures[self.sprite_data.current_frame][
-                0 if self.facing_right else 1
-            ]
-            self.screen.blit(texture, (self.current_x, self.current_y))
+    def handle_input(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            self.overlay.handle_event(event)
+            self.input.handle_event(event)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                self.dog.jump()
+
+        state = self.input.poll()
+        if state["has_new_input"]:
+            # Only a wheel turned past its deadzone walks; left/right already account for it
+            if state["left"] or state["right"]:
+                self.dog.walk_steady("left" if state["left"] else "right", WALK_SPEED)
+            else:
+                self.dog.sit()
+
+        return True
 
     def run(self):
         running = True
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-
-                if self.is_mac:
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_SPACE and not self.is_jumping:
-                            self.jump()
-                        elif event.key == pygame.K_LEFT:
-                            self.walk("left")
-                        elif event.key == pygame.K_RIGHT:
-                            self.walk("right")
-
-                    elif event.type == pygame.KEYUP:
-                        if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
-                            self.is_walking = False
-                            self.sit()
-
-            if not self.is_mac:  # Handle Lego Build HAT controls
-                direction = lego_build_hat_input()  # Get the direction from the motor
-                if direction == "left":
-                    self.walk("left")
-                elif direction == "right":
-                    self.walk("right")
-                else:
-                    self.is_walking = False
-                    self.sit()
-
-            self.update()
-            self.update_texture()
-            self.draw()
-            pygame.display.flip()
+            with PROFILER.scope("input"):
+                running = self.handle_input()
+            with PROFILER.scope("update"):
+                self.game_clock.run_updates(self.step)
+            self.game_clock.run_render(self.draw)
             self.clock.tick(60)
+            PROFILER.end_frame()
 
         pygame.quit()
 
 
 def main():
-    is_mac = '--mac' in sys.argv
-    game = DogSpriteDemo(is_mac)
+    profile_path = profiler.configure(sys.argv)
+    input_backend = create_input(input_spec(sys.argv))
+    game = DogSpriteDemo(input_backend, '--profile' in sys.argv)
     game.setup()
     game.run()
+    input_backend.stop()
+    if profile_path:
+        PROFILER.dump(profile_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,441 @@
+"""Headless benchmarks for the render and animation pipeline.
+
+    python benchmark.py --frames 600 --output bench.json [--baseline bench.json]
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+
+import build_hat_controller
+import collision
+import dog_core
+import input_backends
+import sensor_bus
+import telemetry
+
+FRAME_TIME = 1 / 60  # Game time fed to the fixed-timestep clock per benchmarked frame
+ALLOC_FRAMES = 60  # Frames measured again with tracemalloc on (it is too slow for the timed pass)
+CROWD_SIZES = (1, 10, 100, 1000)
+SCENE_SIZES = (100, 1000, 10000)  # Scene objects for the collision benchmark
+INPUT_SAMPLES = 100000  # Replayed motor samples pushed through the input path
+SYNTHETIC_RATES_HZ = (1000, 5000)  # Sampler rates for the synthetic input load test
+SYNTHETIC_SECONDS = 2.0  # How long each synthetic input run lasts
+
+# Scripted keyboard session: (frame number, event type, key), repeated every KEY_SCRIPT_LENGTH frames
+KEY_SCRIPT = [
+    (10, pygame.KEYDOWN, pygame.K_RIGHT),
+    (70, pygame.KEYUP, pygame.K_RIGHT),
+    (90, pygame.KEYDOWN, pygame.K_SPACE),
+    (150, pygame.KEYDOWN, pygame.K_LEFT),
+    (210, pygame.KEYUP, pygame.K_LEFT),
+]
+KEY_SCRIPT_LENGTH = 240
+
+
+def post_scripted_keys(frame):
+    frame %= KEY_SCRIPT_LENGTH
+    for script_frame, event_type, key in KEY_SCRIPT:
+        if script_frame == frame:
+            pygame.event.post(pygame.event.Event(event_type, key=key))
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure_loop(frame, frames):
+    """Time `frame(i)` for `frames` iterations, then re-run a few with tracemalloc on."""
+    frame_times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        frame(i)
+        frame_times.append(time.perf_counter() - start)
+
+    net_blocks = sys.getallocatedblocks()
+    peak_bytes = 0
+    tracemalloc.start()
+    for i in range(frames, frames + ALLOC_FRAMES):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        frame(i)
+        peak_bytes += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    net_blocks = sys.getallocatedblocks() - net_blocks
+
+    total = sum(frame_times)
+    frame_times.sort()
+    return {
+        "frames": frames,
+        "fps": frames / total if total else 0.0,
+        "p50_ms": percentile(frame_times, 0.50) * 1000.0,
+        "p99_ms": percentile(frame_times, 0.99) * 1000.0,
+        "peak_alloc_bytes_per_frame": peak_bytes / ALLOC_FRAMES,
+        "net_blocks_per_frame": net_blocks / ALLOC_FRAMES,
+    }
+
+
+def bench_pygame_demo(frames, input_spec="keyboard", dirty_rects=False, crowd_size=0, scrolling=False,
+                      renderer="software"):
+    pygame_demo = importlib.import_module("pygame_demo")
+    input_backend = input_backends.create_input(input_spec)
+    keyboard = input_spec.startswith("keyboard")  # Other backends steer themselves
+
+    start = time.perf_counter()
+    # Pinned to the top quality level so runs stay comparable whatever the governor would pick
+    game = pygame_demo.Game(input_backend, dirty_rects, crowd_size, scrolling, quality="high", renderer=renderer)
+    startup = time.perf_counter() - start
+
+    pixels_pushed = []
+
+    def frame(i):
+        if keyboard:
+            post_scripted_keys(i)
+        game.handle_input()
+        game.game_clock.run_updates(game.update, FRAME_TIME)
+        game.game_clock.run_render(game.draw)
+        pixels_pushed.append(game.pixels_pushed)
+
+    result = measure_loop(frame, frames)
+    result["startup_s"] = startup
+    result["pixels_pushed_per_frame"] = sum(pixels_pushed) / len(pixels_pushed)
+    input_backend.stop()
+    pygame.quit()
+    return result
+
+
+def bench_arcade_pygame(frames, input_spec="keyboard"):
+    arcade_pygame = importlib.import_module("arcade-pygame")
+    input_backend = input_backends.create_input(input_spec)
+    keyboard = input_spec.startswith("keyboard")  # Other backends steer themselves
+
+    start = time.perf_counter()
+    game = arcade_pygame.DogSpriteDemo(input_backend)
+    game.setup()
+    startup = time.perf_counter() - start
+
+    def frame(i):
+        if keyboard:
+            post_scripted_keys(i)
+        game.handle_input()
+        game.game_clock.run_updates(game.step, FRAME_TIME)
+        game.game_clock.run_render(game.draw)
+
+    result = measure_loop(frame, frames)
+    result["startup_s"] = startup
+    input_backend.stop()
+    pygame.quit()
+    return result
+
+
+def bench_crowd(ticks):
+    """Compare one vectorized DogCrowd tick against N individual DogSprite.update() calls."""
+    pygame_demo = importlib.import_module("pygame_demo")
+    crowd = importlib.import_module("crowd")
+    pygame.init()
+    screen = pygame.display.set_mode((pygame_demo.SCREEN_WIDTH, pygame_demo.SCREEN_HEIGHT))
+    scales = (pygame_demo.SPRITE_SCALING, pygame_demo.CROWD_SCALING)
+    frame_cache = pygame_demo.load_textures_by_state(
+        "static/welsh-corgi-sprites/corgi-asset.png", pygame_demo.SPRITE_WIDTH, pygame_demo.SPRITE_HEIGHT, scales
+    )
+    spawn_positions = [(100, 300), (500, 350), (800, 400)]
+
+    def time_ticks(tick):
+        start = time.perf_counter()
+        for _ in range(ticks):
+            tick()
+        return (time.perf_counter() - start) / ticks
+
+    results = {}
+    for size in CROWD_SIZES:
+        dogs = crowd.DogCrowd(frame_cache, size, spawn_positions, pygame_demo.SCREEN_WIDTH,
+                              int(pygame_demo.SPRITE_WIDTH * pygame_demo.CROWD_SCALING),
+                              pygame_demo.CROWD_SCALING, seed=0)
+        sprites = pygame.sprite.Group(
+            pygame_demo.DogSprite(frame_cache, x, y, pygame_demo.CROWD_SCALING)
+            for x, y in zip(dogs.x.tolist(), dogs.y.tolist())
+        )
+        crowd_update = time_ticks(dogs.update)
+        sprite_update = time_ticks(sprites.update)
+        crowd_draw = time_ticks(lambda: dogs.draw(screen))
+        results[f"crowd N={size}"] = {
+            "update_us": crowd_update * 1e6,
+            "update_us_per_dog": crowd_update * 1e6 / size,
+            "draw_ms": crowd_draw * 1000.0,
+            "sprite_update_us": sprite_update * 1e6,
+            "sprite_update_us_per_dog": sprite_update * 1e6 / size,
+        }
+    pygame.quit()
+    return results
+
+
+def bench_dog_core(steps):
+    """Time dog_core.Dog.step() alone, with no engine or renderer loaded."""
+    frame_counts = {"sit": 8, "walk": 4, "run": 7, "sniff_walk": 7, "jump": 10}
+    dog = dog_core.Dog(frame_counts, 100, 200, 4096)
+    start = time.perf_counter()
+    for i in range(steps):
+        phase = i % 240
+        if phase == 0:
+            dog.walk("right", 0.8)
+        elif phase == 120:
+            dog.jump()
+        elif phase == 180:
+            dog.walk_steady("left", 2)
+        dog.step()
+    elapsed = time.perf_counter() - start
+    return {"dog_core": {"steps": steps, "step_us": elapsed * 1e6 / steps}}
+
+
+def bench_collisions(queries):
+    """Time one dog-sized collision query against scenes of growing size, grid versus spritecollide."""
+    pygame.init()
+    surface = pygame.Surface((48, 48), pygame.SRCALPHA)
+    pygame.draw.circle(surface, (255, 255, 255, 255), (24, 24), 24)
+    dog_sprite = pygame.sprite.Sprite()
+    dog_sprite.image = pygame.Surface((64, 64), pygame.SRCALPHA)
+    dog_sprite.image.fill((255, 255, 255, 255))
+    dog_sprite.mask = pygame.mask.from_surface(dog_sprite.image)
+
+    results = {}
+    for size in SCENE_SIZES:
+        # A long street with objects spaced out along it, as the scrolling scene places them
+        objects = [collision.SceneObject("prop", collision.OBSTACLE, surface, i * 100, 300 + (i % 3) * 20)
+                   for i in range(size)]
+        start = time.perf_counter()
+        scene = collision.Scene(objects)
+        build_time = time.perf_counter() - start
+        group = pygame.sprite.Group(objects)
+        world_width = size * 100
+
+        start = time.perf_counter()
+        for i in range(queries):
+            dog_sprite.rect = pygame.Rect((i * 37) % world_width, 300, 64, 64)
+            scene.collide(dog_sprite.rect, dog_sprite.mask, dog_sprite.rect.x, dog_sprite.rect.y)
+        grid_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(queries):
+            dog_sprite.rect = pygame.Rect((i * 37) % world_width, 300, 64, 64)
+            pygame.sprite.spritecollide(dog_sprite, group, False, pygame.sprite.collide_mask)
+        spritecollide_time = time.perf_counter() - start
+        results[f"collisions N={size}"] = {
+            "build_ms": build_time * 1000.0,
+            "query_us": grid_time * 1e6 / queries,
+            "spritecollide_us": spritecollide_time * 1e6 / queries,
+        }
+    pygame.quit()
+    return results
+
+
+def write_sweep_log(path, samples, rate_hz=1000):
+    """Write a synthetic telemetry log of the wheel sweeping +-120 degrees."""
+    log = telemetry.TelemetryLog(path)
+    for i in range(samples):
+        t = i / rate_hz
+        position = int(120 * math.sin(2 * math.pi * t / 4.0))
+        speed = int(120 * 2 * math.pi / 4.0 * math.cos(2 * math.pi * t / 4.0))
+        log.write(t, position, speed)
+    log.close()
+
+
+def bench_input_path(samples):
+    """Push replayed samples through recording and the sampler's steering logic as fast as possible."""
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "sweep.mtlg")
+        write_sweep_log(log_path, samples)
+        motor = telemetry.ReplayMotor(log_path, realtime=False)
+        sampler = build_hat_controller.MotorSampler(motor=motor)
+        sampler.zero(0)
+        recorder = telemetry.TelemetryRecorder(os.path.join(tmp, "record.mtlg"))
+
+        start = time.perf_counter()
+        for i in range(samples):
+            speed, position, _ = motor.get()
+            recorder.record(position, speed, i)
+        record_time = time.perf_counter() - start
+        recorder.close()
+
+        start = time.perf_counter()
+        for i in range(samples):
+            sampler.process_sample(i, motor.get_position())
+        sampler_time = time.perf_counter() - start
+
+    return {
+        "input path": {
+            "samples": samples,
+            "record_samples_per_s": samples / record_time,
+            "sampler_samples_per_s": samples / sampler_time,
+        }
+    }
+
+
+def bench_synthetic_input(rates_hz, seconds):
+    """Run the synthetic input backend far above the HAT's rate while polling it once per frame, as a game does."""
+    results = {}
+    for rate_hz in rates_hz:
+        backend = input_backends.create_input(f"synthetic:{rate_hz}")
+        polls = new_input = 0
+        poll_time = 0.0
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            state = backend.poll()
+            poll_time += time.perf_counter() - start
+            polls += 1
+            new_input += state["has_new_input"]
+            time.sleep(FRAME_TIME)
+        backend.stop()
+        results[f"synthetic input {rate_hz} Hz"] = {
+            "samples_per_s": backend.sampler.sample_count / seconds,
+            "poll_us": poll_time * 1e6 / polls,
+            "polls_with_new_input": new_input / polls,
+        }
+    return results
+
+
+def bench_sensor_bus(samples):
+    """Time publishing to the sensor bus and reading it back, as the daemon and its clients do."""
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = sensor_bus.SensorBusWriter(os.path.join(tmp, "bus"))
+        writer.set_rate("A", sensor_bus.DAEMON_RATE_HZ)
+        reader = sensor_bus.SensorBusReader(writer.path)
+
+        start = time.perf_counter()
+        for i in range(samples):
+            writer.publish("A", i, i % 360, 0)
+        publish_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(samples):
+            reader.latest("A")
+        latest_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(samples // 100):
+            reader.history("A", 64)
+        history_time = time.perf_counter() - start
+
+        reader.close()
+        writer.close()
+    return {
+        "sensor bus": {
+            "publish_us": publish_time * 1e6 / samples,
+            "latest_us": latest_time * 1e6 / samples,
+            "history_64_us": history_time * 1e6 / (samples // 100),
+        }
+    }
+
+
+def bench_texture_loaders(repeats):
+    pygame_demo = importlib.import_module("pygame_demo")
+    arcade_pygame = importlib.import_module("arcade-pygame")
+    pygame.init()
+    pygame.display.set_mode((pygame_demo.SCREEN_WIDTH, pygame_demo.SCREEN_HEIGHT))
+
+    results = {}
+    loaders = {
+        "pygame_demo.load_textures_by_state": lambda: pygame_demo.load_textures_by_state(
+            "static/welsh-corgi-sprites/corgi-asset.png",
+            pygame_demo.SPRITE_WIDTH,
+            pygame_demo.SPRITE_HEIGHT,
+        ),
+        "arcade-pygame.load_textures_by_state": lambda: arcade_pygame.load_textures_by_state(
+            "static/welsh-corgi-sprites/corgi-asset.png",
+            arcade_pygame.SPRITE_WIDTH,
+            arcade_pygame.SPRITE_HEIGHT,
+            arcade_pygame.ROWS,
+        ),
+    }
+    for name, load in loaders.items():
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            load()
+            times.append(time.perf_counter() - start)
+        times.sort()
+        results[name] = {
+            "repeats": repeats,
+            "p50_ms": percentile(times, 0.50) * 1000.0,
+            "min_ms": times[0] * 1000.0,
+        }
+    pygame.quit()
+    return results
+
+
+def run_benchmarks(frames, repeats):
+    results = {
+        "pygame_demo": bench_pygame_demo(frames),
+        "pygame_demo --dirty": bench_pygame_demo(frames, dirty_rects=True),
+        "pygame_demo (scripted motor)": bench_pygame_demo(frames, f"synthetic:{build_hat_controller.SAMPLE_RATE_HZ}"),
+        "pygame_demo --crowd=200": bench_pygame_demo(frames, crowd_size=200),
+        "pygame_demo --scroll": bench_pygame_demo(frames, scrolling=True),
+        # Under the dummy video driver this is SDL's software render driver, so it measures the
+        # texture path's overhead rather than what a GPU would gain
+        "pygame_demo --renderer=texture": bench_pygame_demo(frames, renderer="texture"),
+        "pygame_demo --scroll --renderer=texture": bench_pygame_demo(frames, scrolling=True, renderer="texture"),
+        "arcade-pygame": bench_arcade_pygame(frames),
+    }
+    results.update(bench_crowd(frames))
+    results.update(bench_dog_core(INPUT_SAMPLES))
+    results.update(bench_collisions(frames))
+    results.update(bench_input_path(INPUT_SAMPLES))
+    results.update(bench_synthetic_input(SYNTHETIC_RATES_HZ, SYNTHETIC_SECONDS))
+    results.update(bench_sensor_bus(INPUT_SAMPLES))
+    results.update(bench_texture_loaders(repeats))
+    return results
+
+
+def compare(results, baseline):
+    for name, metrics in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        for key, value in metrics.items():
+            if key in old and isinstance(value, float) and old[key]:
+                change = (value - old[key]) / old[key] * 100.0
+                print(f"{name:40} {key:28} {old[key]:12.3f} -> {value:12.3f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=600, help="frames to time per game loop")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per texture loader")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    # Asset paths in the games are relative to the repository root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    results = {
+        "python": sys.version.split()[0],
+        "pygame": pygame.version.ver,
+        "results": run_benchmarks(args.frames, args.repeats),
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results["results"], json.load(f)["results"])
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,242 @@
-from buildhat import Motor
+"""Build HAT motor ports, all sampled from one scheduler thread, each at its own rate."""
+import sys
+import threading
+import time
+from collections import deque
+
+from motion_filter import AlphaBetaGammaFilter
+from profiler import PROFILER
 
-steering_motor = None
-last_position = None  # Changed to None to detect first run
 MIN_CHANGE_THRESHOLD = 15  # Reduced threshold for more responsive control
-initial_position = None  # Store the very first position
-last_steering_value = 0  # Track the last steering value
-
-def setup():
-    global steering_motor
-    global last_position
-    global initial_position
-    if steering_motor is None:
-        steering_motor = Motor('A')
-        # Initialize positions only if they haven't been set
-        if last_position is None:
-            initial_position = steering_motor.get_position()
-            last_position = initial_position
-
-def lego_build_hat_input():
-    setup()
-    global last_position, initial_position, last_steering_value
-    
-    # Get the current rotation of the steering wheel
-    current_position = steering_motor.get_position()
-    
-    # Determine direction based on position change
-    direction = None
-    # Calculate position relative to initial position
-    relative_position = current_position - initial_position
-    if relative_position > 0:
-        direction = "right"
-    elif relative_position < 0:
-        direction = "left"
-
-    
-    # Only update if change is significant enough
-    if abs(current_position - last_position) >= MIN_CHANGE_THRESHOLD:
-        last_position = current_position
-        rotation = relative_position
-        has_new_input = True
-    else:
-        rotation = last_position - initial_position  # Use the last significant position relative to initial
-        has_new_input = False
-
-    # Normalize the rotation to a value between -1 and 1
-    # Assuming max rotation is 100 degrees in each direction
-    normalized_steering = max(min(rotation / 100.0, 1.0), -1.0)
-    
-    # Add a small deadzone around zero to prevent unwanted movement
-    if abs(normalized_steering) < 0.1:
-        normalized_steering = 0.0
-        has_new_input = True  # Allow movement to stop when returning to center
-    
-    # Only consider it a new direction if the steering value changed significantly
-    has_new_direction = abs(normalized_steering - last_steering_value) >= 0.05  # Reduced threshold
-    last_steering_value = normalized_steering
-    
-    # Make sure left/right matches the steering direction
-    is_left = normalized_steering < -0.1
-    is_right = normalized_steering > 0.1
-    
-    return {
-        "steering": normalized_steering,
-        "has_new_input": has_new_input or has_new_direction,  # Allow movement on either condition
-        "left": is_left,
-        "right": is_right,
-        "direction": direction  # Use the direction based on position change
-    }
\ No newline at end of file
+SAMPLE_RATE_HZ = 50  # Default rate at which a port is read
+PORTS = ("A", "B", "C", "D")
+IDLE_WAIT = 0.1  # Longest the scheduler sleeps, in seconds, when no port is due sooner
+HISTORY_SIZE = 256  # Number of timestamped samples kept in the ring
+
+NEUTRAL_STATE = {
+    "steering": 0.0,
+    "steering_rate": 0.0,
+    "has_new_input": False,
+    "left": False,
+    "right": False,
+    "direction": None,
+}
+
+
+class MotorSampler:
+    """Steering state for one motor port, updated from every sample the scheduler reads.
+
+    The latest normalized state is published as a single tuple reference, so readers
+    get it in O(1) without locks.
+    """
+
+    def __init__(self, port='A', rate_hz=SAMPLE_RATE_HZ, history_size=HISTORY_SIZE, motor=None):
+        self.port = port
+        self.interval = 1.0 / rate_hz
+        self.next_due = 0.0  # Scheduler time of the next read
+        self.motor = motor
+        self.samples = deque(maxlen=history_size)  # (timestamp, position) ring
+        self.initial_position = None  # Store the very first position
+        self.last_position = None
+        self.last_steering_value = 0  # Track the last steering value
+        self.motion = AlphaBetaGammaFilter()  # Smoothed wheel velocity from every raw sample
+        self.input_seq = 0  # Bumped for every sample that carries new input
+        self.sample_count = 0  # Samples processed since the sampler was created
+        self.read_errors = 0  # Reads that raised since the sampler was created
+        self.failing = False  # The last read raised; cleared by the next good one
+        self.latest = (dict(NEUTRAL_STATE), 0)
+        self.listeners = []  # Called on the scheduler thread with each state that carries new input
+        self.sample_listeners = []  # Called on the scheduler thread with (timestamp, position, speed) of every read
+
+    @property
+    def rate_hz(self):
+        return 1.0 / self.interval
+
+    def zero(self, position):
+        """Take `position` as the centered wheel."""
+        self.initial_position = position
+        self.last_position = position
+
+    def read(self, timestamp):
+        # One read returns both speed and position
+        try:
+            with PROFILER.scope("hat_read"):
+                speed, position, _ = self.motor.get()
+        except Exception as error:
+            # A serial hiccup on one port must not stop the scheduler; report each failing spell once
+            self.read_errors += 1
+            if not self.failing:
+                self.failing = True
+                print(f"Build HAT port {self.port}: read failed ({error!r}); retrying every {self.interval * 1000:.0f} ms",
+                      file=sys.stderr, flush=True)
+            return
+        if self.failing:
+            self.failing = False
+            print(f"Build HAT port {self.port}: reading again", file=sys.stderr, flush=True)
+        for listener in self.sample_listeners:
+            listener(timestamp, position, speed)
+        self.process_sample(timestamp, position)
+
+    def process_sample(self, timestamp, current_position):
+        self.sample_count += 1
+        self.samples.append((timestamp, current_position))
+        self.motion.update(current_position, timestamp)
+
+        # Calculate position relative to initial position
+        relative_position = current_position - self.initial_position
+
+        # Only update if change is significant enough
+        if abs(current_position - self.last_position) >= MIN_CHANGE_THRESHOLD:
+            self.last_position = current_position
+            rotation = relative_position
+            has_new_input = True
+        else:
+            rotation = self.last_position - self.initial_position  # Use the last significant position relative to initial
+            has_new_input = False
+
+        # Normalize the rotation to a value between -1 and 1
+        # Assuming max rotation is 100 degrees in each direction
+        normalized_steering = max(min(rotation / 100.0, 1.0), -1.0)
+
+        # Add a small deadzone around zero to prevent unwanted movement
+        if abs(normalized_steering) < 0.1:
+            normalized_steering = 0.0
+            has_new_input = True  # Allow movement to stop when returning to center
+
+        # Direction follows the deadzoned steering, so a wheel resting just off center reports none
+        direction = None
+        if normalized_steering > 0:
+            direction = "right"
+        elif normalized_steering < 0:
+            direction = "left"
+
+        # Only consider it a new direction if the steering value changed significantly
+        has_new_direction = abs(normalized_steering - self.last_steering_value) >= 0.05  # Reduced threshold
+        self.last_steering_value = normalized_steering
+
+        if has_new_input or has_new_direction:
+            self.input_seq += 1
+
+        state = {
+            "steering": normalized_steering,
+            "steering_rate": self.motion.velocity / 100.0,  # Normalized steering units per second
+            "has_new_input": has_new_input or has_new_direction,  # Allow movement on either condition
+            "left": normalized_steering < -0.1,  # Make sure left/right matches the steering direction
+            "right": normalized_steering > 0.1,
+            "direction": direction,
+        }
+        # Publish with a single reference swap; readers never see a half-written state
+        self.latest = (state, self.input_seq)
+        if state["has_new_input"]:
+            for listener in self.listeners:
+                listener(state)
+
+
+class HatController:
+    """Owns the HAT's motor ports and samples all open ones from a single scheduler thread.
+
+    `motors` maps ports to stand-ins for buildhat.Motor (a telemetry.ReplayMotor, a
+    synthetic wheel); other ports open the real motor on first use.
+    """
+
+    def __init__(self, motors=None):
+        self.motors = dict(motors or {})
+        self.samplers = {}  # Port -> MotorSampler, for open ports
+        self.users = {}  # Port -> number of open() calls not yet released
+        self.schedule = ()  # Open samplers; swapped as a whole so the scheduler never sees it change mid-pass
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def open(self, port='A', rate_hz=SAMPLE_RATE_HZ):
+        """Return the port's MotorSampler, starting to sample it at `rate_hz` or faster.
+
+        A port already open keeps its state and is read at the highest rate any user asked for.
+        """
+        if port not in PORTS:
+            raise ValueError(f"Unknown Build HAT port {port!r}, expected one of {', '.join(PORTS)}")
+        with self.lock:
+            sampler = self.samplers.get(port)
+            if sampler is None:
+                motor = self.motors.get(port)
+                if motor is None:
+                    # Imported here so the games and tools can load without the buildhat package or a HAT
+                    from buildhat import Motor
+                    motor = self.motors[port] = Motor(port)
+                sampler = MotorSampler(port, rate_hz, motor=motor)
+                sampler.zero(motor.get_position())  # Scheduled only once the motor has answered
+                sampler.next_due = time.monotonic()
+                self.samplers[port] = sampler
+                self.users[port] = 0
+                self.schedule = tuple(self.samplers.values())
+            elif rate_hz > sampler.rate_hz:
+                sampler.interval = 1.0 / rate_hz
+            self.users[port] += 1
+            if not self.running:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        self.wake.set()  # Reschedule around the new port or rate
+        return sampler
+
+    def release(self, port):
+        """Undo one open(); the port stops being sampled when its last user releases it."""
+        thread = None
+        with self.lock:
+            self.users[port] -= 1
+            if self.users[port]:
+                return
+            del self.users[port]
+            del self.samplers[port]
+            self.schedule = tuple(self.samplers.values())
+            if not self.samplers:
+                self.running = False
+                thread, self.thread = self.thread, None
+        self.wake.set()
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        current = threading.current_thread()
+        try:
+            # A thread release() replaced stops even if open() already set running again for its successor
+            while self.running and self.thread is current:
+                self.wake.clear()
+                now = time.monotonic()
+                wake_at = now + IDLE_WAIT
+                for sampler in self.schedule:
+                    if sampler.next_due <= now:
+                        sampler.read(now)
+                        # Keep each port's cadence, but never burst to make up for reads missed while late
+                        sampler.next_due += sampler.interval
+                        if sampler.next_due <= now:
+                            sampler.next_due = now + sampler.interval
+                    wake_at = min(wake_at, sampler.next_due)
+                remaining = wake_at - time.monotonic()
+                if remaining > 0:
+                    self.wake.wait(remaining)
+        finally:
+            # Whatever ended the loop (a listener raising included), let the next open() start a new thread
+            with self.lock:
+                if self.thread is current:
+                    self.running = False
+                    self.thread = None
+
+
+controller = None
+
+
+def shared_controller():
+    """Return the process-wide controller for the real HAT, so every user of a port shares one reader.
+
+    While a sensor_bus daemon is running, the controller reads its ports from the bus
+    instead of opening the HAT, which the daemon already owns.
+    """
+    global controller
+    if controller is None:
+        from sensor_bus import SensorBusReader  # Imported here: sensor_bus builds on this module
+
+        bus = SensorBusReader.attach()
+        controller = HatController(bus.motors() if bus is not None else None)
+    return controller
@@ -0,0 +1,138 @@
+"""Obstacles, pickups and jumpables: a spatial hash broad phase and a mask narrow phase."""
+import pygame
+
+CELL_SIZE = 128  # Grid cell size in world pixels, about one object wide
+
+OBSTACLE = "obstacle"  # Stops the dog
+JUMPABLE = "jumpable"  # Stops the dog unless its feet are off the ground
+PICKUP = "pickup"  # Collected on touch, then removed from the scene
+
+
+class SpatialHash:
+    """Uniform grid mapping (column, row) cells to the items whose rects overlap them."""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) -> list of items
+        self.item_cells = {}  # Item -> the cells it was filed under, for remove()
+
+    def _cells(self, rect):
+        size = self.cell_size
+        return [
+            (column, row)
+            for column in range(rect.left // size, (rect.right - 1) // size + 1)
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1)
+        ]
+
+    def insert(self, item, rect):
+        cells = self._cells(rect)
+        self.item_cells[item] = cells
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(item)
+
+    def remove(self, item):
+        for cell in self.item_cells.pop(item):
+            items = self.cells[cell]
+            items.remove(item)
+            if not items:
+                del self.cells[cell]
+
+    def query(self, rect):
+        """Return the items filed in any cell `rect` covers, each once, in insertion order per cell."""
+        found = {}
+        for cell in self._cells(rect):
+            for item in self.cells.get(cell, ()):
+                found[item] = None
+        return list(found)
+
+    def __len__(self):
+        return len(self.item_cells)
+
+
+class SceneObject(pygame.sprite.DirtySprite):
+    """A static object at world position (x, y).
+
+    `surface` is the object's artwork; `image` is what the renderer draws (the converted
+    surface, or a texture) and defaults to the surface itself.
+    """
+
+    def __init__(self, name, kind, surface, x, y, image=None):
+        super().__init__()
+        self.name = name
+        self.kind = kind
+        self.image = surface if image is None else image
+        self.rect = surface.get_rect(topleft=(x, y))
+        self.mask = pygame.mask.from_surface(surface)
+
+    def blocks(self, airborne):
+        return self.kind == OBSTACLE or (self.kind == JUMPABLE and not airborne)
+
+
+class Scene:
+    """The objects placed in a level, filed in a SpatialHash."""
+
+    def __init__(self, objects=(), cell_size=CELL_SIZE):
+        self.grid = SpatialHash(cell_size)
+        for scene_object in objects:
+            self.add(scene_object)
+
+    def add(self, scene_object):
+        self.grid.insert(scene_object, scene_object.rect)
+
+    def remove(self, scene_object):
+        self.grid.remove(scene_object)
+        scene_object.kill()  # Also leaves any sprite group drawing it
+
+    def visible(self, camera_x, view_width, view_height):
+        return self.grid.query(pygame.Rect(int(camera_x), 0, view_width, view_height))
+
+    def collide(self, hitbox, mask, x, y):
+        """Return the objects whose pixels overlap `mask` drawn with its top-left at (x, y).
+
+        `hitbox` is the box around the mask's solid pixels there; only objects it touches are tested.
+        """
+        return [
+            scene_object
+            for scene_object in self.grid.query(hitbox)
+            if hitbox.colliderect(scene_object.rect)
+            and mask.overlap(scene_object.mask, (scene_object.rect.x - x, scene_object.rect.y - y))
+        ]
+
+    def resolve(self, sprite):
+        """Apply a DogSprite's contacts after a simulation step; returns the pickups it collected.
+
+        A move that pushes the dog further into a solid object is undone and stops a walk.
+        Both positions are compared with the current frame's mask, so a dog that ends up
+        overlapping an object (it landed on one) can still walk off, but never through it.
+        """
+        dog = sprite.dog
+        x = int(dog.x)
+        y = sprite.rect.y
+        collected = []
+        blocked = False
+        for scene_object in self.collide(sprite.place_hitbox(x, y), sprite.mask, x, y):
+            if scene_object.kind == PICKUP:
+                self.remove(scene_object)
+                collected.append(scene_object)
+            elif scene_object.blocks(dog.is_airborne):
+                blocked = True
+
+        if blocked and dog.x != dog.prev_x:
+            overlap = self.solid_overlap(sprite, x, y, dog.is_airborne)
+            if overlap > self.solid_overlap(sprite, int(dog.prev_x), y, dog.is_airborne):
+                dog.x = dog.prev_x
+                if dog.is_walking:
+                    dog.sit()
+        return collected
+
+    def solid_overlap(self, sprite, x, y, airborne):
+        """Pixels of the sprite's mask at (x, y) covered by objects that block a dog that is or isn't airborne."""
+        hitbox = sprite.place_hitbox(x, y)
+        return sum(
+            sprite.mask.overlap_area(scene_object.mask, (scene_object.rect.x - x, scene_object.rect.y - y))
+            for scene_object in self.grid.query(hitbox)
+            if scene_object.blocks(airborne) and hitbox.colliderect(scene_object.rect)
+        )
+
+    def __len__(self):
+        return len(self.grid)
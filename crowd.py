@@ -0,0 +1,116 @@
+"""Crowd mode: many corgis in numpy arrays, advanced in one vectorized pass per step."""
+import math
+
+import numpy as np
+
+from animation import END, timeline_for
+from sprite_loader import STATES_COLUMNS
+
+STATE_NAMES = tuple(STATES_COLUMNS)
+# States the crowd wanders between, with their speed in pixels per simulation step
+CROWD_STATE_SPEEDS = {
+    "walk": 5.0,
+    "run": 10.0,
+    "sniff_walk": 2.5,
+    "sit": 0.0,
+    "sniff": 0.0,
+    "idle1": 0.0,
+}
+STATE_CHANGE_CHANCE = 0.02  # Per dog, per step
+FACINGS = ("right", "left")
+
+
+class DogCrowd:
+    def __init__(self, frame_cache, count, spawn_positions, bounds_width, sprite_width, scale, seed=None,
+                 steps_per_frame=1):
+        # CROWD_STATE_SPEEDS and STATE_CHANGE_CHANCE are per FRAME_DURATION-long step; shorter steps divide them
+        self.count = count
+        self.scale = scale
+        self.max_x = bounds_width - sprite_width
+        self.rng = np.random.default_rng(seed)
+        self.state_change_chance = STATE_CHANGE_CHANCE / steps_per_frame
+
+        # Surface table indexed by [facing, timeline entry], so a dog's image is one lookup
+        timeline = timeline_for(frame_cache.frame_counts, steps_per_frame)
+        self.surfaces = [[frame_cache.get(state, frame, facing == "right", scale)
+                          for state, frame in zip(timeline.state, timeline.frame)] for facing in FACINGS]
+        self.surface_array = np.empty((len(FACINGS), len(timeline.frame)), dtype=object)
+        self.surface_array[:] = self.surfaces
+
+        # The timeline's arrays, to advance every dog's animation at once; a finished ONCE animation holds its last entry
+        self.durations = np.array(timeline.duration, dtype=np.float32)
+        self.next_entry = np.array([entry if following == END else following
+                                    for entry, following in enumerate(timeline.next)], dtype=np.int32)
+        self.state_starts = np.array([timeline.start[state] for state in STATE_NAMES], dtype=np.int32)
+        state_lengths = np.array([timeline.length[state] for state in STATE_NAMES], dtype=np.int32)
+        # A step crosses more than one frame only if a crowd state has frames shorter than a step
+        shortest = min(duration for state, duration in zip(timeline.state, timeline.duration) if state in CROWD_STATE_SPEEDS)
+        self.crossings_per_step = math.ceil(1 / shortest)
+        self.state_speeds = np.zeros(len(STATE_NAMES), dtype=np.float32)
+        for state, speed in CROWD_STATE_SPEEDS.items():
+            self.state_speeds[STATE_NAMES.index(state)] = speed / steps_per_frame
+        self.crowd_states = np.array([STATE_NAMES.index(state) for state in CROWD_STATE_SPEEDS], dtype=np.int8)
+
+        # The first dogs take the named spawn points, the rest scatter along the same street band
+        spawn_positions = np.array(spawn_positions, dtype=np.float32).reshape(-1, 2)
+        anchors = spawn_positions[self.rng.integers(0, len(spawn_positions), count)]
+        self.x = self.rng.uniform(0, self.max_x, count).astype(np.float32)
+        self.y = anchors[:, 1] + self.rng.uniform(-20, 20, count).astype(np.float32)
+        named = min(count, len(spawn_positions))
+        self.x[:named] = spawn_positions[:named, 0]
+        self.y[:named] = spawn_positions[:named, 1]
+        self.prev_x = self.x.copy()
+
+        self.state = self.rng.choice(self.crowd_states, count)
+        self.facing = self.rng.integers(0, 2, count).astype(np.int8)
+        self.entry = (self.state_starts[self.state]
+                      + self.rng.integers(0, 1 << 16, count) % state_lengths[self.state]).astype(np.int32)
+        self.phase = np.zeros(count, dtype=np.float32)  # Steps played of each dog's current entry
+
+        # Draw order by y so dogs further down the street overlap the ones behind them
+        self.sorted_order = np.argsort(self.y, kind="stable")
+        self.draw_order = self.sorted_order
+
+    def set_visible_fraction(self, fraction):
+        """Draw only the first `fraction` of the dogs; all of them keep being simulated."""
+        visible = int(round(self.count * fraction))
+        self.draw_order = self.sorted_order[self.sorted_order < visible]
+
+    def update(self):
+        """Advance every dog by one simulation step."""
+        self.prev_x[:] = self.x
+
+        # Occasionally switch state; a new state restarts its animation
+        switch = self.rng.random(self.count) < self.state_change_chance
+        if switch.any():
+            self.state[switch] = self.rng.choice(self.crowd_states, int(switch.sum()))
+            self.entry[switch] = self.state_starts[self.state[switch]]
+            self.phase[switch] = 0
+
+        direction = 1.0 - 2.0 * self.facing  # +1 facing right, -1 facing left
+        self.x += self.state_speeds[self.state] * direction
+
+        # Turn around at the edges of the world
+        bounced = (self.x < 0) | (self.x > self.max_x)
+        self.facing[bounced] ^= 1
+        np.clip(self.x, 0, self.max_x, out=self.x)
+
+        # Play one step of every animation, moving the dogs that finished a frame on to the next
+        self.phase += 1.0
+        for _ in range(self.crossings_per_step):
+            durations = self.durations[self.entry]
+            crossing = self.phase >= durations
+            self.phase -= durations * crossing
+            np.copyto(self.entry, self.next_entry[self.entry], where=crossing)
+
+    def draw_list(self, alpha=1.0, camera_x=0):
+        """Return the images and (x, y) positions of the visible dogs, back to front."""
+        order = self.draw_order
+        x = self.prev_x[order] + (self.x[order] - self.prev_x[order]) * alpha - camera_x
+        images = self.surface_array[self.facing[order], self.entry[order]]
+        positions = zip(x.astype(np.int32).tolist(), self.y[order].astype(np.int32).tolist())
+        return images.tolist(), positions
+
+    def draw(self, surface, alpha=1.0, camera_x=0):
+        images, positions = self.draw_list(alpha, camera_x)
+        surface.blits(zip(images, positions), doreturn=False)
@@ -0,0 +1,145 @@
+"""Engine-independent corgi: the sit/walk/jump state machine, movement and animation, stepped at a fixed rate."""
+from animation import timeline_for
+from locomotion import DEFAULT_CONTROLLER
+
+STEERING_DISTANCE = 200  # How far a fully turned wheel sends the dog, in pixels
+
+
+class Dog:
+    """One corgi.
+
+    `frame_counts` maps each animation state to its number of frames. `steps_per_frame`
+    is how many simulation steps make animation.FRAME_DURATION at playback rate 1, so
+    games with different step lengths play the animations at the same speed. `width` is the
+    drawn width, used to keep the whole dog inside `bounds_width`. `events` lists the
+    animation events (such as "takeoff") fired during the last step.
+    """
+
+    def __init__(self, frame_counts, x, width, bounds_width, locomotion=DEFAULT_CONTROLLER, steps_per_frame=1):
+        self.frame_counts = frame_counts
+        self.width = width
+        self.bounds_width = bounds_width
+        self.locomotion = locomotion
+        self.steps_per_frame = steps_per_frame
+        self.timeline = timeline_for(frame_counts, steps_per_frame)
+        self.current_state = "sit"
+        self.entry = self.timeline.start["sit"]  # Position in the timeline's flat arrays
+        self.current_frame = 0
+        self.frame_phase = 0.0  # Steps played of the current entry
+        self.playback_rate = 1.0  # Timeline steps played per simulation step
+        self.events = []
+        self.reported_events = 0  # Events the last step reported; later ones came from set_state() since
+        self.facing_right = True
+        self.is_jumping = False
+        self.is_airborne = False  # Between a jump's "takeoff" and "land" events
+        self.is_walking = False
+        self.change_x = 0.0  # Pixels per step
+        self.target_x = None  # Where a steered walk stops; None walks until told otherwise
+        self.x = float(x)
+        self.prev_x = self.x  # Position at the previous step, for interpolation
+
+    def set_state(self, state):
+        """Switch animation, restarting it from its first frame and firing that frame's event."""
+        timeline = self.timeline
+        self.current_state = state
+        self.entry = timeline.start[state]
+        self.current_frame = timeline.frame[self.entry]
+        self.frame_phase = 0.0
+        event = timeline.event[self.entry]
+        if event is not None:
+            # Reported by the step that plays the frame, even when the switch came from input between steps
+            self.events.append(event)
+
+    def sit(self):
+        self.is_walking = False
+        self.change_x = 0.0
+        self.target_x = None
+        # Key releases and stop events repeat; an already sitting dog keeps its animation going.
+        # A jump plays out first, and sits the dog when it ends
+        if not self.is_jumping and self.current_state != "sit":
+            self.set_state("sit")
+            self.playback_rate = 1.0
+
+    def jump(self):
+        if self.is_jumping:
+            return
+        self.set_state("jump")
+        self.playback_rate = 1.0
+        self.is_jumping = True
+
+    def walk(self, direction, steering=0.0, steering_rate=0.0):
+        """Walk towards a target set by how far the wheel is turned; gait and speed come from the locomotion table.
+
+        `steering` is the signed wheel position (-1..1) and `steering_rate` its rate of change,
+        so the table can tell a wheel turned outwards from one returning to center.
+        """
+        state, speed, playback_rate = self.locomotion.lookup(steering, steering_rate)
+        if state == "sit":
+            self.sit()
+            return
+        if self.is_jumping and (direction == "right") != self.facing_right:
+            return  # A jump keeps the direction it started in; turning would reverse its root motion
+
+        if not self.is_jumping:
+            if state != self.current_state:
+                self.set_state(state)
+            self.playback_rate = playback_rate
+        self.facing_right = direction == "right"
+
+        move_distance = abs(steering) * STEERING_DISTANCE
+        if self.facing_right:
+            self.target_x = min(self.x + move_distance, self.bounds_width - self.width)
+            self.change_x = speed
+        else:
+            self.target_x = max(self.x - move_distance, 0)
+            self.change_x = -speed
+        self.is_walking = True
+
+    def walk_steady(self, direction, speed):
+        """Walk at `speed` pixels per step until sit() is called, as the arrow keys do in the arcade games."""
+        facing_right = direction == "right"
+        if self.is_jumping and facing_right != self.facing_right:
+            return  # A jump keeps the direction it started in
+        if self.is_walking and self.target_x is None and facing_right == self.facing_right:
+            return  # Already walking this way; keep the animation running
+        self.facing_right = facing_right
+        if not self.is_jumping:
+            self.set_state("walk")
+            self.playback_rate = 1.0
+        self.change_x = speed if facing_right else -speed
+        self.target_x = None
+        self.is_walking = True
+
+    def step(self):
+        """Advance one fixed simulation step."""
+        self.prev_x = self.x
+        events = self.events
+        del events[:self.reported_events]
+
+        if self.is_walking:
+            if self.target_x is not None and abs(self.target_x - self.x) < abs(self.change_x):
+                # Close enough to the target: snap to it and stop
+                self.x = self.target_x
+                self.sit()
+            else:
+                self.x += self.change_x
+
+        # Faster gaits play their animation faster; root motion (the jump's) moves along with it
+        timeline = self.timeline
+        self.entry, self.frame_phase, motion, finished = timeline.advance(
+            self.entry, self.frame_phase, self.playback_rate, events)
+        self.current_frame = timeline.frame[self.entry]
+        if motion:
+            self.x += motion if self.facing_right else -motion
+        self.x = max(0, min(self.x, self.bounds_width - self.width))
+
+        for event in events:
+            if event == "takeoff":
+                self.is_airborne = True
+            elif event == "land":
+                self.is_airborne = False
+        if finished and self.is_jumping:
+            self.is_jumping = False
+            self.is_airborne = False
+            self.sit()
+        self.reported_events = len(events)
@@ -0,0 +1,78 @@
+import time
+
+MAX_CATCH_UP_STEPS = 5  # Never run more than this many simulation steps per rendered frame
+TIMING_SMOOTHING = 0.1  # Weight of the newest measurement in the update/render time averages
+
+
+class FixedTimestepClock:
+    """Advances the simulation in fixed steps, independent of how fast frames are rendered.
+
+    Real elapsed time goes into an accumulator which is drained one `step` at a time.
+    Whatever is left over becomes `alpha`, the fraction of a step to interpolate by when drawing.
+    """
+
+    def __init__(self, step, max_steps=MAX_CATCH_UP_STEPS):
+        self.step = step  # Seconds of game time per simulation step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.last_time = None
+        self.total_steps = 0
+        self.dropped_time = 0.0  # Game time discarded because we fell too far behind
+        self.update_time = 0.0  # Smoothed seconds per simulation step
+        self.render_time = 0.0  # Smoothed seconds per rendered frame
+
+    def advance(self, elapsed):
+        """Add `elapsed` seconds and return how many simulation steps to run."""
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            # Too far behind to catch up; drop the backlog instead of spiralling
+            self.dropped_time += (steps - self.max_steps) * self.step
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.step + steps * self.step
+        self.accumulator -= steps * self.step
+        self.alpha = self.accumulator / self.step
+        self.total_steps += steps
+        return steps
+
+    def tick(self):
+        """Measure real time since the previous tick and advance by it."""
+        now = time.perf_counter()
+        elapsed = 0.0 if self.last_time is None else now - self.last_time
+        self.last_time = now
+        return self.advance(elapsed)
+
+    def run_updates(self, update, elapsed=None):
+        """Call `update()` once per due step; pass `elapsed` when the engine already measured it."""
+        steps = self.tick() if elapsed is None else self.advance(elapsed)
+        if steps:
+            start = time.perf_counter()
+            for _ in range(steps):
+                update()
+            self.update_time = self._smooth(self.update_time, (time.perf_counter() - start) / steps)
+        return steps
+
+    def run_render(self, draw):
+        """Call `draw(alpha)` and record how long it took."""
+        start = time.perf_counter()
+        draw(self.alpha)
+        self.render_time = self._smooth(self.render_time, time.perf_counter() - start)
+
+    @property
+    def update_ms(self):
+        return self.update_time * 1000.0
+
+    @property
+    def render_ms(self):
+        return self.render_time * 1000.0
+
+    @staticmethod
+    def _smooth(average, sample):
+        if average == 0.0:
+            return sample
+        return average + (sample - average) * TIMING_SMOOTHING
+
+
+def lerp(previous, current, alpha):
+    return previous + (current - previous) * alpha
@@ -0,0 +1,191 @@
+"""Steering input backends shared by the games, picked by a spec string and created with create_input()."""
+import math
+import time
+
+from build_hat_controller import SAMPLE_RATE_HZ, HatController, shared_controller
+
+KEYBOARD_STEERING = 0.5  # Arrow keys steer like a half-turned wheel (a walk)
+SYNTHETIC_RATE_HZ = 1000  # Default sample rate of the synthetic wheel, far above the HAT's
+INPUT_BACKENDS = {}  # Name -> factory taking the spec's argument (the text after ':') or None
+
+
+def register_backend(name):
+    """Decorator adding a factory to INPUT_BACKENDS under `name`."""
+    def register(factory):
+        INPUT_BACKENDS[name] = factory
+        return factory
+    return register
+
+
+def create_input(spec):
+    """Return a started backend for a spec of the form "name" or "name:argument"."""
+    name, _, argument = spec.partition(":")
+    factory = INPUT_BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown input backend {name!r}, expected one of {', '.join(INPUT_BACKENDS)}")
+    backend = factory(argument or None)
+    backend.start()
+    return backend
+
+
+def input_spec(argv, default="hat"):
+    """Return the backend spec from the command line, for create_input().
+
+    --input=keyboard|hat[:PORT]|replay:PATH|synthetic:HZ picks any backend; the older
+    --mac and --replay=PATH flags still work.
+    """
+    spec = default
+    for arg in argv:
+        if arg == '--mac':
+            spec = "keyboard"
+        elif arg.startswith('--replay='):
+            spec = "replay:" + arg.split('=', 1)[1]
+        elif arg.startswith('--input='):
+            spec = arg.split('=', 1)[1]
+    return spec
+
+
+def steering_state(steering, has_new_input, direction=None, steering_rate=0.0):
+    # "direction" is None whenever "steering" is 0, i.e. inside the wheel's deadzone
+    if direction is None and steering:
+        direction = "right" if steering > 0 else "left"
+    return {
+        "steering": steering,
+        "steering_rate": steering_rate,
+        "has_new_input": has_new_input,
+        "left": steering < -0.1,
+        "right": steering > 0.1,
+        "direction": direction,
+    }
+
+
+class KeyboardInput:
+    """The left and right arrow keys as a wheel turned by `steering`; the key pressed last wins.
+
+    Fed from the game's own event loop through `handle_event()`, so posted events (the
+    benchmark's scripted keys) steer it the same way real key presses do.
+    """
+
+    def __init__(self, steering=KEYBOARD_STEERING):
+        import pygame  # Not at module level: arcade-demo uses this module without pygame
+
+        self.key_down = pygame.KEYDOWN
+        self.key_up = pygame.KEYUP
+        self.key_steering = {pygame.K_LEFT: -steering, pygame.K_RIGHT: steering}
+        self.held = []  # Arrow keys held down, oldest first
+        self.steering = 0.0
+        self.changed = False
+        self.listeners = []
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def handle_event(self, event):
+        if event.type not in (self.key_down, self.key_up) or event.key not in self.key_steering:
+            return
+        if event.key in self.held:
+            self.held.remove(event.key)
+        if event.type == self.key_down:
+            self.held.append(event.key)
+        steering = self.key_steering[self.held[-1]] if self.held else 0.0
+        if steering != self.steering:
+            self.steering = steering
+            self.changed = True
+            state = steering_state(steering, True)
+            for listener in self.listeners:
+                listener(state)
+
+    def poll(self):
+        state = steering_state(self.steering, self.changed)
+        self.changed = False
+        return state
+
+
+class MotorInput:
+    """Steering from one port of a HatController: the HAT's own motors, a replayed log or a synthetic wheel.
+
+    Several inputs may watch the same port (or different ports, for two players); each
+    one tracks which samples it has already reported.
+    """
+
+    def __init__(self, controller, port='A', rate_hz=SAMPLE_RATE_HZ):
+        self.controller = controller
+        self.port = port
+        self.rate_hz = rate_hz
+        self.sampler = None  # The port's MotorSampler, once started
+        self.last_seen_seq = 0
+
+    def start(self):
+        if self.sampler is None:
+            self.sampler = self.controller.open(self.port, self.rate_hz)
+            self.last_seen_seq = self.sampler.input_seq
+
+    def stop(self):
+        # Safe to call twice (a closed window, then an exit handler)
+        if self.sampler is None:
+            return
+        self.sampler = None
+        self.controller.release(self.port)
+
+    def add_listener(self, listener):
+        """Have `listener(state)` called from the scheduler thread whenever the steering input changes."""
+        self.sampler.listeners.append(listener)
+
+    def handle_event(self, event):
+        pass
+
+    def poll(self):
+        state, seq = self.sampler.latest
+        # Report new input only once per batch of samples, however many arrived since the last poll
+        has_new_input = seq != self.last_seen_seq
+        self.last_seen_seq = seq
+        return dict(state, has_new_input=has_new_input)
+
+
+class SyntheticMotor:
+    """Stands in for buildhat.Motor: sweeps the wheel back and forth `amplitude` degrees every `period` seconds."""
+
+    def __init__(self, amplitude=120, period=4.0):
+        self.amplitude = amplitude
+        self.period = period
+        self.start = time.monotonic()
+
+    def get_position(self):
+        phase = (time.monotonic() - self.start) / self.period
+        return int(self.amplitude * math.sin(2 * math.pi * phase))
+
+    def get(self):
+        position = self.get_position()
+        return [0, position, position]
+
+
+@register_backend("keyboard")
+def keyboard_backend(steering):
+    return KeyboardInput(float(steering) if steering else KEYBOARD_STEERING)
+
+
+@register_backend("hat")
+def hat_backend(port):
+    return MotorInput(shared_controller(), port or 'A')
+
+
+@register_backend("replay")
+def replay_backend(path):
+    if not path:
+        raise ValueError("The replay input needs a log path, as in replay:session.mtlg")
+    from telemetry import ReplayMotor
+
+    return MotorInput(HatController({'A': ReplayMotor(path)}))
+
+
+@register_backend("synthetic")
+def synthetic_backend(rate_hz):
+    # Load-tests the input path: the scheduler reads the wheel at rate_hz and every sample is processed
+    rate_hz = float(rate_hz) if rate_hz else SYNTHETIC_RATE_HZ
+    return MotorInput(HatController({'A': SyntheticMotor()}), rate_hz=rate_hz)
@@ -0,0 +1,64 @@
+"""Turns keyboard presses and steering-motor samples into deduplicated game events."""
+from collections import deque, namedtuple
+
+SteerChanged = namedtuple("SteerChanged", ["direction", "steering"])
+Jump = namedtuple("Jump", [])
+Stop = namedtuple("Stop", [])
+
+STEERING_STEP = 0.05  # Smallest steering change worth reporting, matches the controller's threshold
+
+
+class InputEventQueue:
+    def __init__(self, steering_step=STEERING_STEP):
+        self.steering_step = steering_step
+        self.events = deque()  # Appends from the motor scheduler thread and pops from the game loop are thread-safe
+        self.direction = None
+        self.steering = 0.0
+
+    def steer(self, steering):
+        """Post a steering value in -1..1; 0 means the wheel is centered."""
+        direction = None
+        if steering > 0:
+            direction = "right"
+        elif steering < 0:
+            direction = "left"
+
+        if direction is None:
+            if self.direction is not None:
+                self.direction = None
+                self.steering = 0.0
+                self.events.append(Stop())
+            return
+
+        if direction == self.direction and abs(steering - self.steering) < self.steering_step:
+            return
+        self.direction = direction
+        self.steering = steering
+        self.events.append(SteerChanged(direction, steering))
+
+    def jump(self):
+        self.events.append(Jump())
+
+    def stop(self):
+        self.steer(0.0)
+
+    def on_motor_state(self, state):
+        """Listener for build_hat_controller.MotorSampler; runs on the HatController's scheduler thread."""
+        self.steer(state["steering"])
+
+    def key_down(self, action):
+        if action == "jump":
+            self.jump()
+        elif action == "left":
+            self.steer(-1.0)
+        elif action == "right":
+            self.steer(1.0)
+
+    def key_up(self, action):
+        if action == self.direction:
+            self.stop()
+
+    def drain(self):
+        events = self.events
+        while events:
+            yield events.popleft()
@@ -0,0 +1,59 @@
+"""Maps steering input to a gait, a speed and a playback rate through precomputed lookup tables."""
+
+TABLE_SIZE = 64
+RATE_BOOST = 0.25  # How much turning the wheel out fast (normalized units per second) pushes toward the next gait
+
+# (gait, lowest steering magnitude, speed at that magnitude, speed at the next gait's threshold,
+#  speed at which the gait's animation plays at its authored rate); speeds in pixels per simulation step
+GAITS = (
+    ("sit", 0.0, 0.0, 0.0, 1.0),
+    ("sniff_walk", 0.1, 2.0, 4.0, 3.0),
+    ("walk", 0.35, 4.0, 8.0, 5.0),
+    ("run", 0.7, 9.0, 16.0, 12.0),
+)
+MIN_PLAYBACK_RATE = 0.5
+MAX_PLAYBACK_RATE = 2.0
+
+
+class LocomotionController:
+    """`speed_scale` multiplies every speed in `gaits`, for games whose simulation step is a
+    fraction of the one the table was tuned for; playback rates are unaffected."""
+
+    def __init__(self, table_size=TABLE_SIZE, gaits=GAITS, speed_scale=1.0):
+        self.table_size = table_size
+        self.states = []
+        self.speeds = []
+        self.playback_rates = []
+        for index in range(table_size):
+            magnitude = index / (table_size - 1)
+            state, speed, playback_rate = self._evaluate(magnitude, gaits)
+            self.states.append(state)
+            self.speeds.append(speed * speed_scale)
+            self.playback_rates.append(playback_rate)
+
+    @staticmethod
+    def _evaluate(magnitude, gaits):
+        for position, (state, low, low_speed, high_speed, reference_speed) in enumerate(gaits):
+            high = gaits[position + 1][1] if position + 1 < len(gaits) else 1.0
+            if magnitude < high or position + 1 == len(gaits):
+                # Interpolate speed across the gait's steering band
+                t = (magnitude - low) / (high - low) if high > low else 0.0
+                speed = low_speed + (high_speed - low_speed) * max(0.0, min(t, 1.0))
+                playback_rate = speed / reference_speed if speed else 1.0
+                playback_rate = max(MIN_PLAYBACK_RATE, min(playback_rate, MAX_PLAYBACK_RATE))
+                return state, speed, playback_rate
+
+    def lookup(self, steering, steering_rate=0.0):
+        """Return (state, speed, playback_rate) for a signed steering position in -1..1.
+
+        Only a wheel being turned further out (its rate has the steering's sign) is boosted;
+        one heading back to center slows the dog down like any smaller turn.
+        """
+        effective = abs(steering)
+        if steering * steering_rate > 0:
+            effective += RATE_BOOST * abs(steering_rate)
+        index = int(min(effective, 1.0) * (self.table_size - 1))
+        return self.states[index], self.speeds[index], self.playback_rates[index]
+
+
+DEFAULT_CONTROLLER = LocomotionController()
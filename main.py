@@ -1,5 +1,9 @@
 import sys
 import pygame
+import profiler
+from input_backends import create_input, input_spec
+from profiler import PROFILER
+from profiler_overlay import ProfilerOverlay
 
 # Initialization
 pygame.init()
@@ -21,49 +25,10 @@ STEP_SIZE = 5
 
 # Parse arguments
 use_keyboard = len(sys.argv) > 1 and sys.argv[1] == "mac"
+profile_path = profiler.configure(sys.argv)  # --profile shows the timing overlay, --profile-out=PATH dumps a trace
 
-# Mock LEGO Build HAT API for macOS testing
-class LegoBuildHatMock:
-    def read(self):
-        return None  # Replace with mock data like "left" or "right" if testing this part.
-
-from abc import ABC, abstractmethod
-
-# Abstract base class for input handling
-class InputHandler(ABC):
-    @abstractmethod
-    def get_action(self):
-        """Return 'left', 'right', or None based on input"""
-        pass
-
-# Keyboard input handler (macOS)
-class KeyboardInputHandler(InputHandler):
-    def get_action(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            return "left"
-        if keys[pygame.K_RIGHT]:
-            return "right"
-        return None
-
-# LEGO Build HAT input handler (Raspberry Pi)
-class LegoHatInputHandler(InputHandler):
-    def __init__(self, lego_hat):
-        self.lego_hat = lego_hat
-
-    def get_action(self):
-        # Replace with real LEGO Build HAT input reading logic
-        return self.lego_hat.read()
-
-# Factory to choose the correct input handler
-def create_input_handler(use_keyboard):
-    if use_keyboard:
-        return KeyboardInputHandler()
-    else:
-        return LegoHatInputHandler(lego_hat)
-
-
-lego_hat = LegoBuildHatMock() if use_keyboard else None
+# "mac" as the first argument still picks the keyboard
+input_handler = create_input(input_spec(sys.argv, "keyboard" if use_keyboard else "hat"))
 
 # Initialize screen
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -72,34 +37,46 @@ pygame.display.set_caption("Circle Game")
 # Clock for controlling frame rate
 clock = pygame.time.Clock()
 
-# Game loop
-
-input_handler = create_input_handler(use_keyboard)
+overlay = ProfilerOverlay(visible='--profile' in sys.argv)
 
+# Game loop
 running = True
 while running:
-    screen.fill(BACKGROUND_COLOR)
-
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # Get action from input handler
-    action = input_handler.get_action()
-    if action == "left" and circle_x - CIRCLE_RADIUS > 0:
-        circle_x -= STEP_SIZE
-    elif action == "right" and circle_x + CIRCLE_RADIUS < SCREEN_WIDTH:
-        circle_x += STEP_SIZE
-
-    # Draw the circle
-    pygame.draw.circle(screen, CIRCLE_COLOR, (circle_x, circle_y), CIRCLE_RADIUS)
+    with PROFILER.scope("input"):
+        # Handle events
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            overlay.handle_event(event)
+            input_handler.handle_event(event)
+
+        # Move while the keys are held or the wheel is turned past its deadzone
+        state = input_handler.poll()
+        action = "left" if state["left"] else "right" if state["right"] else None
+
+    with PROFILER.scope("update"):
+        if action == "left" and circle_x - CIRCLE_RADIUS > 0:
+            circle_x -= STEP_SIZE
+        elif action == "right" and circle_x + CIRCLE_RADIUS < SCREEN_WIDTH:
+            circle_x += STEP_SIZE
+
+    with PROFILER.scope("draw"):
+        screen.fill(BACKGROUND_COLOR)
+
+        # Draw the circle
+        pygame.draw.circle(screen, CIRCLE_COLOR, (circle_x, circle_y), CIRCLE_RADIUS)
+        overlay.draw(screen)
 
     # Update the display
-    pygame.display.flip()
+    with PROFILER.scope("flip"):
+        pygame.display.flip()
 
     # Cap the frame rate
     clock.tick(FPS)
+    PROFILER.end_frame()
 
 # Quit the game
+input_handler.stop()
+if profile_path:
+    PROFILER.dump(profile_path)
 pygame.quit()
@@ -1,8 +1,11 @@
 import pygame
 import sys
-from buildhat import Motor
-import threading
-import time
+from build_hat_controller import HatController, shared_controller
+from telemetry import ReplayMotor, TelemetryRecorder
+from text_cache import TextCache
+import profiler
+from profiler import PROFILER
+from profiler_overlay import ProfilerOverlay
 
 # Initialize Pygame
 pygame.init()
@@ -19,20 +22,27 @@ WHITE = (255, 255, 255)
 GRAY = (150, 150, 150)
 RED = (255, 0, 0)
 
+SAMPLE_RATE_HZ = 50  # Motor reads per second; every read is recorded, filtered or not
+
 # Font setup
 font = pygame.font.Font(None, 36)
+text_cache = TextCache(font)
 
 class MotorMonitor:
-    def __init__(self):
+    def __init__(self, motor=None, recorder=None, profile_path=None, show_profile=False, port='A'):
         self.current_position = 0
         self.previous_position = 0
-        self.motor = Motor('A')
-        self.running = True
+        # The port is read by a HatController, the same reader the games use, rather than a Motor of our own;
+        # with a sensor_bus daemon running it reads the daemon's samples, so the game can run alongside
+        self.port = port
+        self.controller = HatController({port: motor}) if motor is not None else shared_controller()
+        self.recorder = recorder if recorder is not None else TelemetryRecorder()
+        self.profile_path = profile_path  # Where to dump the timing trace on exit, if anywhere
+        self.overlay = ProfilerOverlay(visible=show_profile, position=(WINDOW_WIDTH - 308, 80))
         self.MIN_CHANGE_THRESHOLD = 15  # Minimum change in position to register
         
-        # Add speed tracking
-        self.current_speed = 0  # degrees per second
-        self.last_update_time = time.time()
+        # Static labels never change, so render them once up front
+        self.threshold_text = font.render(f"Min Change Threshold: {self.MIN_CHANGE_THRESHOLD}°", True, GRAY).convert_alpha()
         
         # Object parameters
         self.object_width = 50
@@ -41,35 +51,34 @@ class MotorMonitor:
         self.current_x = self.base_x
         
         # Start motor monitoring
-        self.monitor_thread = threading.Thread(target=self.monitor_motor)
-        self.monitor_thread.start()
+        self.sampler = self.controller.open(port, SAMPLE_RATE_HZ)
+        self.sampler.sample_listeners.append(self.on_sample)
+    
+    @property
+    def current_speed(self):
+        # The sampler already filters every raw read, not just threshold crossings (degrees per second)
+        return self.sampler.motion.velocity
     
-    def calculate_speed(self, new_position):
-        current_time = time.time()
-        time_diff = current_time - self.last_update_time
-        if time_diff > 0:
-            position_diff = new_position - self.current_position
-            self.current_speed = position_diff / time_diff
-        self.last_update_time = current_time
+    def on_sample(self, timestamp, new_position, speed):
+        # Runs on the controller's scheduler thread for every raw read; keep them all for later analysis
+        self.recorder.record(new_position, speed, timestamp)
+        # Only update if the change is significant enough
+        if abs(new_position - self.current_position) >= self.MIN_CHANGE_THRESHOLD:
+            self.previous_position = self.current_position
+            self.current_position = new_position
+            
+            # Calculate movement based on current position
+            # Normalize the position to stay within board width
+            normalized_position = self.current_position % 360  # Convert to 0-360 range
+            movement_ratio = normalized_position / 360.0  # Convert to 0-1 range
+            available_width = WINDOW_WIDTH - self.object_width
+            movement = movement_ratio * available_width
+            self.current_x = movement  # Direct position instead of offset from base
+            self.current_x = max(0, min(self.current_x, WINDOW_WIDTH - self.object_width))
     
-    def monitor_motor(self):
-        while self.running:
-            new_position = self.motor.get_position()
-            # Only update if the change is significant enough
-            if abs(new_position - self.current_position) >= self.MIN_CHANGE_THRESHOLD:
-                self.previous_position = self.current_position
-                self.calculate_speed(new_position)
-                self.current_position = new_position
-                
-                # Calculate movement based on current position
-                # Normalize the position to stay within board width
-                normalized_position = self.current_position % 360  # Convert to 0-360 range
-                movement_ratio = normalized_position / 360.0  # Convert to 0-1 range
-                available_width = WINDOW_WIDTH - self.object_width
-                movement = movement_ratio * available_width
-                self.current_x = movement  # Direct position instead of offset from base
-                self.current_x = max(0, min(self.current_x, WINDOW_WIDTH - self.object_width))
-            time.sleep(0.1)
+    def stop(self):
+        self.controller.release(self.port)
+        self.recorder.close()
     
     def draw_speed_gauge(self, screen):
         # Draw speed gauge background
@@ -90,54 +99,73 @@ class MotorMonitor:
             color = RED if self.current_speed > 0 else (0, 0, 255)  # Red for clockwise, Blue for counter-clockwise
             pygame.draw.rect(screen, color, (gauge_x, gauge_y, filled_width, gauge_height))
     
+    def draw(self, screen):
+        screen.fill(BLACK)
+        
+        # Update direction text
+        direction = "RIGHT" if self.previous_position < self.current_position else "LEFT"
+        direction_color = WHITE
+        
+        # Draw all the text and visuals; labels are only rasterized when their value changes
+        current_text = text_cache.render(f"Current Position: {self.current_position}°", WHITE)
+        screen.blit(current_text, (20, 50))
+        
+        previous_text = text_cache.render(f"Previous Position: {self.previous_position}°", GRAY)
+        screen.blit(previous_text, (20, 100))
+        
+        # Whole degrees per second: the filtered speed jitters in its decimals, which would miss the cache every frame
+        speed_text = text_cache.render(f"Speed: {round(self.current_speed)}°/s", WHITE)
+        screen.blit(speed_text, (20, 150))
+        
+        movement_text = text_cache.render(f"Moving: {direction}", direction_color)
+        screen.blit(movement_text, (20, 200))
+
+        # Draw threshold indicator text
+        screen.blit(self.threshold_text, (20, 250))
+        
+        # Draw speed gauge
+        self.draw_speed_gauge(screen)
+        
+        # Draw the movable object
+        pygame.draw.rect(screen, RED, (self.current_x, WINDOW_HEIGHT - 100, 
+                                     self.object_width, self.object_height))
+        
+        # Draw center line
+        pygame.draw.line(screen, GRAY, (WINDOW_WIDTH//2, WINDOW_HEIGHT - 120),
+                       (WINDOW_WIDTH//2, WINDOW_HEIGHT - 80), 2)
+    
     def run(self):
         clock = pygame.time.Clock()
         
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    self.running = False
-                    self.monitor_thread.join()
+                    self.stop()
+                    if self.profile_path:
+                        PROFILER.dump(self.profile_path)
                     pygame.quit()
                     sys.exit()
+                self.overlay.handle_event(event)
             
-            screen.fill(BLACK)
-            
-            # Update direction text
-            direction = "RIGHT" if self.previous_position < self.current_position else "LEFT"
-            direction_color = WHITE
-            
-            # Draw all the text and visuals
-            current_text = font.render(f"Current Position: {self.current_position}°", True, WHITE)
-            screen.blit(current_text, (20, 50))
-            
-            previous_text = font.render(f"Previous Position: {self.previous_position}°", True, GRAY)
-            screen.blit(previous_text, (20, 100))
-            
-            speed_text = font.render(f"Speed: {self.current_speed:.1f}°/s", True, WHITE)
-            screen.blit(speed_text, (20, 150))
-            
-            movement_text = font.render(f"Moving: {direction}", True, direction_color)
-            screen.blit(movement_text, (20, 200))
-
-            # Draw threshold indicator text
-            threshold_text = font.render(f"Min Change Threshold: {self.MIN_CHANGE_THRESHOLD}°", True, GRAY)
-            screen.blit(threshold_text, (20, 250))
-            
-            # Draw speed gauge
-            self.draw_speed_gauge(screen)
-            
-            # Draw the movable object
-            pygame.draw.rect(screen, RED, (self.current_x, WINDOW_HEIGHT - 100, 
-                                         self.object_width, self.object_height))
-            
-            # Draw center line
-            pygame.draw.line(screen, GRAY, (WINDOW_WIDTH//2, WINDOW_HEIGHT - 120),
-                           (WINDOW_WIDTH//2, WINDOW_HEIGHT - 80), 2)
-            
-            pygame.display.flip()
+            with PROFILER.scope("draw"):
+                self.draw(screen)
+                self.overlay.draw(screen)
+            with PROFILER.scope("flip"):
+                pygame.display.flip()
             clock.tick(60)
+            PROFILER.end_frame()
 
 if __name__ == "__main__":
-    monitor = MotorMonitor()
+    motor = None
+    recorder = None
+    port = 'A'
+    profile_path = profiler.configure(sys.argv)
+    for arg in sys.argv[1:]:
+        if arg.startswith('--replay='):
+            motor = ReplayMotor(arg.split('=', 1)[1])
+        elif arg.startswith('--record='):
+            recorder = TelemetryRecorder(arg.split('=', 1)[1])
+        elif arg.startswith('--port='):
+            port = arg.split('=', 1)[1]
+    monitor = MotorMonitor(motor, recorder, profile_path, '--profile' in sys.argv, port)
     monitor.run()
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""Named timing scopes with rolling statistics and a trace dump; a flag check per scope while disabled."""
+import csv
+import json
+import sys
+import time
+from array import array
+from collections import deque
+from contextlib import nullcontext
+
+PROFILE_WINDOW = 240  # Samples per scope kept for the rolling statistics
+TRACE_FRAMES = 3600  # Frames kept for dump()
+HISTOGRAM_EDGES_MS = (1, 2, 4, 8, 16.7, 33.3, 66.7)  # Upper edges of the frame time buckets; the last bucket is open
+STARTUP_BUDGET = 1.0  # Seconds from launch to the first frame on screen that startup should stay within
+
+NULL_SCOPE = nullcontext()
+
+
+class ScopeStats:
+    """Rolling window of durations, in milliseconds, for one scope."""
+
+    def __init__(self, window=PROFILE_WINDOW):
+        self.window = window
+        self.samples = array("d", bytes(8 * window))
+        self.head = 0
+        self.count = 0
+        self.total_calls = 0
+
+    def record(self, ms):
+        self.samples[self.head] = ms
+        self.head = (self.head + 1) % self.window
+        if self.count < self.window:
+            self.count += 1
+        self.total_calls += 1
+
+    def summary(self):
+        """Return mean, p50, p95 and max over the window, in milliseconds."""
+        if not self.count:
+            return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(self.samples[:self.count])
+        return {
+            "mean": sum(ordered) / self.count,
+            "p50": ordered[self.count // 2],
+            "p95": ordered[min(self.count - 1, int(self.count * 0.95))],
+            "max": ordered[-1],
+        }
+
+    def histogram(self, edges=HISTOGRAM_EDGES_MS):
+        counts = [0] * (len(edges) + 1)
+        for ms in self.samples[:self.count]:
+            bucket = 0
+            while bucket < len(edges) and ms > edges[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+
+class _Scope:
+    # One reusable context per name, so entering a scope allocates nothing; not reentrant
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    """Collects scope timings per frame.
+
+    Scopes may also be timed from other threads (the HAT sampler reads the motor on its
+    own thread); under the GIL a sample recorded concurrently with `end_frame()` can land
+    in either frame, which is fine for diagnostics.
+    """
+
+    def __init__(self, enabled=False, window=PROFILE_WINDOW, trace_frames=TRACE_FRAMES):
+        self.enabled = enabled
+        self.window = window
+        self.stats = {}
+        self.scopes = {}
+        self.current = {}  # Scope name -> seconds spent in it this frame
+        self.trace = deque(maxlen=trace_frames)
+        self.frame = 0
+        self.frame_start = None
+
+    def scope(self, name):
+        if not self.enabled:
+            return NULL_SCOPE
+        scope = self.scopes.get(name)
+        if scope is None:
+            scope = self.scopes[name] = _Scope(self, name)
+        return scope
+
+    def record(self, name, seconds):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ScopeStats(self.window)
+        stats.record(seconds * 1000.0)
+        self.current[name] = self.current.get(name, 0.0) + seconds
+
+    def end_frame(self):
+        """Close the current frame: record its total time and append it to the trace."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.record("frame", now - self.frame_start)
+            self.trace.append((self.frame, {name: seconds * 1000.0 for name, seconds in self.current.items()}))
+        # Anything timed before the first frame boundary is startup work, not part of a frame
+        self.current = {}
+        self.frame_start = now
+        self.frame += 1
+
+    def summary(self):
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def dump(self, path):
+        """Write the trace to `path`: one row per frame for .csv, trace plus summary for .json."""
+        names = sorted({name for _, scopes in self.trace for name in scopes})
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame"] + [f"{name}_ms" for name in names])
+                for frame, scopes in self.trace:
+                    writer.writerow([frame] + [f"{scopes.get(name, 0.0):.4f}" for name in names])
+        else:
+            with open(path, "w") as f:
+                json.dump({
+                    "summary": self.summary(),
+                    "histogram_edges_ms": HISTOGRAM_EDGES_MS,
+                    "frame_histogram": self.stats["frame"].histogram() if "frame" in self.stats else [],
+                    "frames": [{"frame": frame, **scopes} for frame, scopes in self.trace],
+                }, f, indent=1)
+
+
+PROFILER = Profiler()
+
+
+class StartupTimer:
+    """Splits startup into named phases and reports them once the first frame is on screen.
+
+    `start` can be taken before the heavy imports (time.perf_counter() at the top of the
+    entry point) so they show up as a phase of their own.
+    """
+
+    def __init__(self, start=None, budget=STARTUP_BUDGET):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.budget = budget
+        self.phases = []  # (name, seconds)
+
+    def mark(self, name):
+        """End the current phase, naming it `name`."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        phases = ", ".join(f"{name} {seconds * 1000.0:.0f} ms" for name, seconds in self.phases)
+        verdict = "over" if self.total > self.budget else "within"
+        print(f"startup: {phases}; first frame after {self.total * 1000.0:.0f} ms, "
+              f"{verdict} the {self.budget * 1000.0:.0f} ms budget", file=sys.stderr, flush=True)
+
+
+def configure(argv):
+    """Apply --profile (show the overlay) and --profile-out=PATH (dump the trace at exit) from `argv`.
+
+    Returns the dump path, or None. Either flag enables the profiler.
+    """
+    dump_path = None
+    for arg in argv:
+        if arg == '--profile':
+            PROFILER.enabled = True
+        elif arg.startswith('--profile-out='):
+            dump_path = arg.split('=', 1)[1]
+            PROFILER.enabled = True
+    return dump_path
@@ -0,0 +1,97 @@
+"""On-screen overlay for the profiler's rolling scope timings, toggled with F3."""
+import pygame
+
+from profiler import HISTOGRAM_EDGES_MS, PROFILER
+from text_cache import TextCache
+
+OVERLAY_REFRESH = 15  # Frames between overlay text updates, so the numbers stay readable and cached
+OVERLAY_TOGGLE_KEY = pygame.K_F3
+
+
+class ProfilerOverlay:
+    """Draws the rolling per-scope timings and a frame time histogram in a screen corner."""
+
+    WIDTH = 300
+    LINE_HEIGHT = 16
+    BAR_HEIGHT = 30
+    COLUMN_RIGHT_EDGES = (160, 220, 292)
+    BACKGROUND = (0, 0, 0)
+    TEXT_COLOR = (255, 255, 255)
+    BAR_COLOR = (0, 200, 0)
+    SLOW_BAR_COLOR = (220, 60, 0)
+
+    def __init__(self, profiler=PROFILER, visible=False, position=(8, 8), convert=True):
+        self.profiler = profiler
+        self.visible = visible
+        if visible:
+            profiler.enabled = True
+        self.text_cache = TextCache(pygame.font.Font(None, 18), convert=convert)
+        self.surface = None
+        self.rect = pygame.Rect(position, (self.WIDTH, 0))
+        self.frames_until_refresh = 0
+
+    def toggle(self):
+        """Show or hide the overlay; showing it also turns the profiler on. Returns the area it covered."""
+        covered = self.rect.copy()
+        self.visible = not self.visible
+        if self.visible:
+            self.profiler.enabled = True
+            self.frames_until_refresh = 0
+        return covered
+
+    def handle_event(self, event):
+        """Toggle on the overlay key; returns the area to repaint when the overlay was hidden, else None."""
+        if event.type == pygame.KEYDOWN and event.key == OVERLAY_TOGGLE_KEY:
+            covered = self.toggle()
+            return None if self.visible else covered
+        return None
+
+    def current_surface(self):
+        """Return the overlay image for this frame (a new Surface after each refresh), or None while hidden."""
+        if not self.visible:
+            return None
+        self.frames_until_refresh -= 1
+        if self.surface is None or self.frames_until_refresh <= 0:
+            self.surface = self._render()
+            self.rect.size = self.surface.get_size()
+            self.frames_until_refresh = OVERLAY_REFRESH
+        return self.surface
+
+    def draw(self, screen):
+        """Blit the overlay and return its rect, or None while hidden."""
+        surface = self.current_surface()
+        if surface is None:
+            return None
+        screen.blit(surface, self.rect)
+        return self.rect
+
+    def _render(self):
+        stats = self.profiler.stats
+        names = sorted(stats, key=lambda name: (name != "frame", name))
+        surface = pygame.Surface((self.WIDTH, (len(names) + 1) * self.LINE_HEIGHT + self.BAR_HEIGHT + 8))
+        surface.fill(self.BACKGROUND)
+        self._row(surface, 2, ("scope", "p50", "p95", "max ms"))
+        y = 2 + self.LINE_HEIGHT
+        for name in names:
+            summary = stats[name].summary()
+            self._row(surface, y, (name, f"{summary['p50']:.1f}", f"{summary['p95']:.1f}", f"{summary['max']:.1f}"))
+            y += self.LINE_HEIGHT
+
+        # Frame time histogram; buckets past one 60 FPS frame are drawn in the warning color
+        if "frame" in stats:
+            counts = stats["frame"].histogram()
+            bar_width = (self.WIDTH - 8) // len(counts)
+            peak = max(counts) or 1
+            for bucket, count in enumerate(counts):
+                height = int(self.BAR_HEIGHT * count / peak)
+                slow = bucket >= len(HISTOGRAM_EDGES_MS) or HISTOGRAM_EDGES_MS[bucket] > 16.7
+                pygame.draw.rect(surface, self.SLOW_BAR_COLOR if slow else self.BAR_COLOR,
+                                 (4 + bucket * bar_width, y + self.BAR_HEIGHT - height, bar_width - 2, height))
+        return surface
+
+    def _row(self, surface, y, cells):
+        # The font is proportional, so each column is placed separately: name left-aligned, numbers right-aligned
+        surface.blit(self.text_cache.render(cells[0], self.TEXT_COLOR), (4, y))
+        for right, cell in zip(self.COLUMN_RIGHT_EDGES, cells[1:]):
+            text = self.text_cache.render(cell, self.TEXT_COLOR)
+            surface.blit(text, (right - text.get_width(), y))
@@ -1,8 +1,22 @@
+import time
+LAUNCHED = time.perf_counter()  # Before the imports below, so startup reports include them
 import os
 import sys
 import pygame
-import time
-from build_hat_controller import lego_build_hat_input
+from game_clock import MAX_CATCH_UP_STEPS, FixedTimestepClock, lerp
+from input_backends import create_input, input_spec
+from crowd import DogCrowd
+from collision import JUMPABLE, OBSTACLE, PICKUP, Scene, SceneObject
+from animation import FRAME_DURATION
+from locomotion import LocomotionController
+from dog_core import Dog
+from world import ParallaxLayer, World
+from quality import QUALITY_LEVELS, QualityGovernor, level_by_name
+from renderer import create_renderer, load_frame_cache
+import profiler
+from profiler import PROFILER, StartupTimer
+from profiler_overlay import ProfilerOverlay
+from sprite_loader import STATES_COLUMNS
 
 os.environ["DISPLAY"] = ":0"  # Only for RPI
 
@@ -10,6 +24,7 @@ os.environ["DISPLAY"] = ":0"  # Only for RPI
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 576
 SPRITE_SCALING = 3.2
+CROWD_SCALING = 1.5  # Crowd dogs are drawn smaller so hundreds fit on screen
 SPRITE_WIDTH = 64
 SPRITE_HEIGHT = 64
 SPAWN_POINTS = {
@@ -17,168 +32,177 @@ SPAWN_POINTS = {
     "bench": {"x": 0.5, "y": 0.65},      # middle of screen
     "park_entrance": {"x": 0.8, "y": 0.7} # 80% from left
 }
-JUMP_MOVE_X = 50
 FPS = 60
-FRAME_DELAY = 100  # milliseconds between frame changes
-
-# State configurations
-states_columns = {
-    "jump": 11,
-    "idle1": 5,
-    "idle2": 5,
-    "sit": 9,
-    "walk": 5,
-    "run": 8,
-    "sniff": 8,
-    "sniff_walk": 8,
-}
+SIMULATION_STEP = 20  # milliseconds per fixed simulation step; divides every authored frame duration
+TEXTURE_STEPS = FRAME_DURATION // SIMULATION_STEP  # Simulation steps per animation frame of default length
+# The locomotion table's speeds are tuned for one step per default-length frame
+LOCOMOTION = LocomotionController(speed_scale=1 / TEXTURE_STEPS)
+WORLD_WIDTH = SCREEN_WIDTH * 4  # Play area in scrolling mode
+BACKGROUND_PATH = "static/background/city_winter.png"
+STREET_TOP = 0.7  # Fraction of the screen (and background image) where the near street layer starts
+STREAM_BUDGET = 0.004  # Seconds per frame spent building assets deferred past the first frame
+# Objects on the street in every screen-wide stretch of the level: (art, kind, x as a fraction of the screen)
+STREET_OBJECTS = (
+    ("bone", PICKUP, 0.3),
+    ("bench", JUMPABLE, SPAWN_POINTS["bench"]["x"]),
+    ("bone", PICKUP, 0.65),
+)
+# Closes off the far end of the level
+END_OBJECTS = (("gate", OBSTACLE, SPAWN_POINTS["park_entrance"]["x"]),)
+
+def load_textures_by_state(sprite_sheet_path, sprite_width, sprite_height, scales=(SPRITE_SCALING,)):
+    # Build every frame the game can show once at startup, so the animation loop only does lookups
+    return load_frame_cache(sprite_sheet_path, STATES_COLUMNS, sprite_width, sprite_height, scales)
+
+def draw_bone():
+    surface = pygame.Surface((44, 18), pygame.SRCALPHA)
+    color = (245, 240, 225)
+    pygame.draw.rect(surface, color, (8, 5, 28, 8))
+    for x in (6, 38):
+        for y in (5, 13):
+            pygame.draw.circle(surface, color, (x, y), 5)
+    return surface
+
+def draw_bench():
+    surface = pygame.Surface((110, 56), pygame.SRCALPHA)
+    wood = (120, 78, 40)
+    pygame.draw.rect(surface, wood, (0, 0, 110, 10))  # Backrest
+    pygame.draw.rect(surface, wood, (0, 24, 110, 10))  # Seat
+    for x in (8, 94):
+        pygame.draw.rect(surface, (60, 60, 60), (x, 10, 8, 46))  # Legs
+    return surface
+
+def draw_gate():
+    surface = pygame.Surface((60, 150), pygame.SRCALPHA)
+    iron = (40, 45, 50)
+    for x in range(0, 60, 14):
+        pygame.draw.rect(surface, iron, (x, 0, 6, 150))
+    pygame.draw.rect(surface, iron, (0, 20, 60, 6))
+    pygame.draw.rect(surface, iron, (0, 110, 60, 6))
+    return surface
 
-class SpriteSheet:
-    def __init__(self, filename):
-        self.sheet = pygame.image.load(filename).convert_alpha()
-        self.first_col_width = 100
-
-    def get_sprite(self, x, y, width, height, flip=False):
-        sprite = pygame.Surface((width, height), pygame.SRCALPHA)
-        sprite.blit(self.sheet, (0, 0), (x, y, width, height))
-        if flip:
-            sprite = pygame.transform.flip(sprite, True, False)
-        return sprite
-
-def load_textures_by_state(sprite_sheet, sprite_width, sprite_height):
-    textures_by_state = {}
-    row = 0
-    for state, columns in states_columns.items():
-        textures = []
-        for col in range(1, columns):
-            x = sprite_sheet.first_col_width + (col - 1) * sprite_width
-            y = row * sprite_height
-            texture = sprite_sheet.get_sprite(x, y, sprite_width, sprite_height)
-            flipped_texture = sprite_sheet.get_sprite(x, y, sprite_width, sprite_height, flip=True)
-            textures.append((texture, flipped_texture))
-        row += 1
-        textures_by_state[state] = textures
-    return textures_by_state
-
-class DogSprite(pygame.sprite.Sprite):
-    def __init__(self, textures_by_state, initial_x, initial_y):
+OBJECT_ART = {"bone": draw_bone, "bench": draw_bench, "gate": draw_gate}
+
+def build_scene(renderer, world_width, ground_y):
+    """Place STREET_OBJECTS in every screen-wide stretch of the level and END_OBJECTS in the last, standing on ground_y."""
+    art = {name: draw() for name, draw in OBJECT_ART.items()}
+    images = {name: renderer.load_image(surface) for name, surface in art.items()}
+    stretches = max(1, world_width // SCREEN_WIDTH)
+    placements = [(stretch, placement) for stretch in range(stretches) for placement in STREET_OBJECTS]
+    placements += [(stretches - 1, placement) for placement in END_OBJECTS]
+    objects = []
+    for stretch, (name, kind, x) in placements:
+        surface = art[name]
+        objects.append(SceneObject(name, kind, surface, int((stretch + x) * SCREEN_WIDTH),
+                                   ground_y - surface.get_height(), images[name]))
+    return Scene(objects)
+
+class DogSprite(pygame.sprite.DirtySprite):
+    """Draws a dog_core.Dog with pygame; all of the dog's behaviour lives in the core."""
+
+    def __init__(self, frame_cache, initial_x, initial_y, scale=SPRITE_SCALING, locomotion=LOCOMOTION,
+                 bounds_width=SCREEN_WIDTH):
         super().__init__()
-        self.textures_by_state = textures_by_state
-        self.current_state = "sit"
-        self.current_frame = 0
-        self.facing_right = True
-        self.is_jumping = False
-        self.is_walking = False
-        self.jump_frames_remaining = 0
-        self.change_x = 0
-        self.target_x = None  # Target position to move to
-        self.movement_speed = 5  # Base movement speed
-        
-        # Set initial image and position
-        self.image = self.textures_by_state["sit"][0][0]
-        self.image = pygame.transform.scale(self.image, 
-                                         (int(SPRITE_WIDTH * SPRITE_SCALING), 
-                                          int(SPRITE_HEIGHT * SPRITE_SCALING)))
+        self.frame_cache = frame_cache
+        self.shapes = frame_cache.shapes
+        self.scale = scale
+        self.image = self.frame_cache.get("sit", 0, True, self.scale)
         self.rect = self.image.get_rect()
         self.rect.x = initial_x
         self.rect.y = initial_y
-        
-        self.last_update = pygame.time.get_ticks()
-        
-    def sit(self):
-        self.current_state = "sit"
-        self.current_frame = 0
-        self.is_walking = False
-        self.change_x = 0
-        self.target_x = None
-        
-    def jump(self):
-        if not self.is_jumping:
-            self.current_state = "jump"
-            self.current_frame = 0
-            self.is_jumping = True
-            total_frames = len(self.textures_by_state["jump"])
-            self.jump_frames_remaining = total_frames
-            # Calculate horizontal movement per frame during jump
-            self.jump_x_per_frame = JUMP_MOVE_X / total_frames * (1 if self.facing_right else -1)
-            
-    def walk(self, direction, steering_value=0):
-        self.current_state = "walk"
-        self.facing_right = direction == "right"
-        
-        # Calculate target position based on steering value
-        move_distance = abs(steering_value) * 200  # Scale the movement distance
-        
-        # Always update target position based on current position
-        if direction == "right":
-            self.target_x = min(self.rect.x + move_distance, SCREEN_WIDTH - self.rect.width)
-            self.change_x = self.movement_speed
-        else:
-            self.target_x = max(self.rect.x - move_distance, 0)
-            self.change_x = -self.movement_speed
-        
-        # If steering value is very small, stop moving
-        if abs(steering_value) < 0.1:
-            self.sit()
-            return
-            
-        self.is_walking = True
-        
+        # The current frame's collision mask and hitbox (relative to the frame), looked up with the image
+        self.mask, self.frame_hitbox = self.shapes.get("sit", 0, True, self.scale)
+        self.hitbox = self.frame_hitbox.copy()  # Moved in place by place_hitbox()
+        # Simulated once per fixed step (SIMULATION_STEP); rect.x is only the interpolated render position
+        self.dog = Dog(frame_cache.frame_counts, initial_x, self.rect.width, bounds_width, locomotion, TEXTURE_STEPS)
+        self.shown = ("sit", 0, True)  # (state, frame, facing_right) currently in self.image
+
+    def show_current_frame(self):
+        dog = self.dog
+        shown = (dog.current_state, dog.current_frame, dog.facing_right)
+        if shown != self.shown:
+            self.shown = shown
+            self.image = self.frame_cache.get(dog.current_state, dog.current_frame, dog.facing_right, self.scale)
+            self.mask, self.frame_hitbox = self.shapes.get(*shown, self.scale)
+            self.dirty = 1  # Image changed, repaint in dirty-rect mode
+
+    def place_hitbox(self, x, y):
+        """Return the current frame's hitbox with the frame's top-left at (x, y); the same Rect, moved in place."""
+        box = self.frame_hitbox
+        self.hitbox.update(x + box.x, y + box.y, box.width, box.height)
+        return self.hitbox
+
     def update(self):
-        now = pygame.time.get_ticks()
-        if now - self.last_update > FRAME_DELAY:
-            self.last_update = now
-            
-            # Update position - include jump movement if jumping
-            if self.is_jumping:
-                self.rect.x += self.jump_x_per_frame
-            
-            # Handle target position-based movement
-            if self.target_x is not None and self.is_walking:
-                # Calculate distance to target
-                distance_to_target = abs(self.target_x - self.rect.x)
-                
-                if distance_to_target < abs(self.change_x):
-                    # If we're very close to target, snap to it
-                    self.rect.x = self.target_x
-                    if abs(self.change_x) <= self.movement_speed:  # Only sit if not moving fast
-                        self.sit()
-                else:
-                    # Move towards target
-                    self.rect.x += self.change_x
-            
-            # Keep the dog within screen boundaries
-            self.rect.x = max(0, min(self.rect.x, SCREEN_WIDTH - self.rect.width))
-            
-            # Update animation frame
-            textures = self.textures_by_state[self.current_state]
-            self.current_frame = (self.current_frame + 1) % len(textures)
-            
-            # Update image based on direction
-            texture = textures[self.current_frame][0 if self.facing_right else 1]
-            self.image = pygame.transform.scale(texture,
-                                             (int(SPRITE_WIDTH * SPRITE_SCALING),
-                                              int(SPRITE_HEIGHT * SPRITE_SCALING)))
-            
-            # Handle jump completion
-            if self.is_jumping:
-                self.jump_frames_remaining -= 1
-                if self.jump_frames_remaining <= 0:
-                    self.is_jumping = False
-                    self.sit()
+        self.dog.step()
+        self.show_current_frame()
+
+    def feet_y(self, scale=None):
+        """Offset from the top of the frame to the line the standing dog's feet touch at `scale`."""
+        # The sitting frame's solid pixels, not the cell, whose transparent margin grows with the scale
+        return self.shapes.get("sit", 0, True, self.scale if scale is None else scale)[1].bottom
+
+    def set_scale(self, scale):
+        # Switch to another prebuilt scale, keeping the feet where they were
+        feet = self.rect.y + self.feet_y()
+        self.scale = scale
+        self.shown = None
+        self.show_current_frame()
+        self.rect = self.image.get_rect(x=self.rect.x, y=feet - self.feet_y())
+        self.dog.width = self.rect.width
+        max_x = self.dog.bounds_width - self.rect.width
+        self.dog.x = min(self.dog.x, max_x)
+        self.dog.prev_x = min(self.dog.prev_x, max_x)
+
+    def interpolate(self, alpha, camera_x=0):
+        # Place the sprite between the last two simulation steps for smooth rendering
+        x = int(lerp(self.dog.prev_x, self.dog.x, alpha) - camera_x)
+        if x != self.rect.x:
+            self.rect.x = x
+            self.dirty = 1
 
 class Game:
-    def __init__(self, is_mac):
+    def __init__(self, input_backend, dirty_rects=False, crowd_size=0, scrolling=False, show_profile=False,
+                 quality="auto", renderer="auto"):
+        self.startup = StartupTimer(LAUNCHED)
+        self.startup.mark("imports")
         pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Dog Sprite Demo")
+        # Software blits to the display surface, or SDL2 textures scaled and mirrored while drawing
+        self.renderer = create_renderer((SCREEN_WIDTH, SCREEN_HEIGHT), "Dog Sprite Demo", renderer)
+        self.screen = self.renderer.screen  # None with the texture renderer
         self.clock = pygame.time.Clock()
-        self.is_mac = is_mac
-        self.prev_direction = None  # Track previous steering direction
+        # Catches up on as much game time as it did with one step per animation frame
+        self.game_clock = FixedTimestepClock(SIMULATION_STEP / 1000.0, MAX_CATCH_UP_STEPS * TEXTURE_STEPS)
+        self.input = input_backend
+        # Only repaint and push changed regions instead of full flips; a crowd or a
+        # scrolling camera repaints most of the screen anyway, and textures are redrawn every frame
+        self.dirty_rects = dirty_rects and not crowd_size and not scrolling and self.screen is not None
+        self.pixels_pushed = 0  # Pixels sent to the display in the last frame
+        # "auto" starts at the top quality level and adapts; a level name pins it
+        self.governor = QualityGovernor(
+            start=0 if quality == "auto" else level_by_name(quality),
+            adaptive=quality == "auto",
+            on_change=self.apply_quality,
+        )
+        level = self.governor.level
+        self.startup.mark("display")
         
-        # Load background
-        self.background = pygame.image.load("static/background/city_winter.png").convert()
-        self.background = pygame.transform.scale(self.background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        # Load background: either one static screen, or parallax layers streamed in as the camera moves
+        self.world = None
+        self.background = None
+        if scrolling:
+            street_y = int(SCREEN_HEIGHT * STREET_TOP)
+            self.world = World([
+                ParallaxLayer("city", BACKGROUND_PATH, 0.5, 0, SCREEN_HEIGHT),
+                ParallaxLayer("street", BACKGROUND_PATH, 1.0, street_y, SCREEN_HEIGHT - street_y,
+                              source_top=STREET_TOP, source_height=1.0 - STREET_TOP),
+            ], SCREEN_WIDTH, WORLD_WIDTH)
+        else:
+            # Only the variant the starting level shows is built now; the others are streamed in after
+            # the first frame, so a later quality switch still never rescales mid-game
+            self.backgrounds = {}
+            self.background = self.background_variant(level)
+        world_width = self.world.width if self.world else SCREEN_WIDTH
+        self.startup.mark("background")
 
          # Calculate spawn position (using "street" as default spawn point)
         spawn_point = SPAWN_POINTS["street"]
@@ -186,63 +210,193 @@ class Game:
         initial_y = int(SCREEN_HEIGHT * spawn_point["y"])
         
         # Load sprite sheet and create dog sprite
-        sprite_sheet = SpriteSheet("static/welsh-corgi-sprites/corgi-asset.png")
-        textures = load_textures_by_state(sprite_sheet, SPRITE_WIDTH, SPRITE_HEIGHT)
+        # Every sprite scale a quality level can switch to is prebuilt from sprite_loader's sheet-size frames.
+        # Only the sitting frames shown first are scaled and converted now; the rest stream in after the first frame
+        scales = tuple(sorted({level.sprite_scale for level in QUALITY_LEVELS}, reverse=True))
+        if crowd_size:
+            scales += (CROWD_SCALING,)
+        frame_cache = self.renderer.load_frames("static/welsh-corgi-sprites/corgi-asset.png", STATES_COLUMNS,
+                                                SPRITE_WIDTH, SPRITE_HEIGHT, scales, preload=("sit",))
+        self.startup.mark("sprites")
+        
+        # Optional crowd of background dogs, all advanced together in one vectorized pass
+        self.crowd = None
+        if crowd_size:
+            spawn_positions = [(SCREEN_WIDTH * point["x"], SCREEN_HEIGHT * point["y"]) for point in SPAWN_POINTS.values()]
+            self.crowd = DogCrowd(frame_cache, crowd_size, spawn_positions, world_width,
+                                  int(SPRITE_WIDTH * CROWD_SCALING), CROWD_SCALING, steps_per_frame=TEXTURE_STEPS)
         
         # Create sprite group and add dog
-        self.all_sprites = pygame.sprite.Group()
-        self.dog = DogSprite(textures, initial_x, initial_y)
-        self.all_sprites.add(self.dog)
+        if self.dirty_rects:
+            # LayeredDirty restores the background under moved sprites and reports changed rects
+            self.all_sprites = pygame.sprite.LayeredDirty()
+            self.all_sprites.clear(self.screen, self.background)
+        else:
+            self.all_sprites = pygame.sprite.Group()
+        self.dog_sprite = DogSprite(frame_cache, initial_x, initial_y, level.sprite_scale, bounds_width=world_width)
+        self.dog = self.dog_sprite.dog  # Input drives the engine-independent core directly
+        self.all_sprites.add(self.dog_sprite)
+        if self.crowd:
+            self.crowd.set_visible_fraction(level.crowd_fraction)
+        
+        # Obstacles, pickups and jumpables stand on the line the sitting dog's feet touch
+        self.scene = build_scene(self.renderer, world_width, initial_y + self.dog_sprite.feet_y())
+        self.pickups_collected = 0
+        if self.dirty_rects:
+            # Everything on screen has to be a sprite in dirty-rect mode; added first so the dog draws on top
+            self.all_sprites.add(*self.scene.visible(0, SCREEN_WIDTH, SCREEN_HEIGHT))
+            self.all_sprites.move_to_front(self.dog_sprite)
+        
+        self.overlay = ProfilerOverlay(visible=show_profile, convert=self.renderer.converts_surfaces)
+        self.startup.mark("scene")
+        
+        # Work left for after the first frame, run a STREAM_BUDGET slice per frame
+        self.frame_cache = frame_cache
+        self.deferred = [lambda: self.frame_cache.stream(STREAM_BUDGET)]
+        if self.background is not None:
+            self.deferred.append(self.build_backgrounds)
+        self.first_frame_shown = False
         
     def handle_input(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
-            if self.is_mac:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE and not self.dog.is_jumping:
-                        self.dog.jump()
-                    elif event.key == pygame.K_LEFT:
-                        self.dog.walk("left")
-                    elif event.key == pygame.K_RIGHT:
-                        self.dog.walk("right")
-                elif event.type == pygame.KEYUP:
-                    if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
-                        self.dog.sit()
+            covered = self.overlay.handle_event(event)
+            if covered and self.dirty_rects:
+                # Bring back what the hidden overlay was covering
+                self.all_sprites.repaint_rect(covered)
+            self.input.handle_event(event)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and not self.dog.is_jumping:
+                self.dog.jump()
         
-        if not self.is_mac:
-            direction = lego_build_hat_input()
-            current_direction = direction["direction"]
-            
-            # Only start a new walk if we have new input and a valid direction
-            if current_direction is not None and direction["has_new_input"]:
-                steering_value = abs(direction["steering"])
-                self.dog.walk(current_direction, steering_value)
-            
-            self.prev_direction = current_direction
+        state = self.input.poll()
+        # Only act when the input changed; a centered wheel or released keys stop the dog
+        if state["has_new_input"]:
+            if state["direction"] is None:
+                self.dog.sit()
+            else:
+                self.dog.walk(state["direction"], state["steering"], state["steering_rate"])
             
         return True
     
+    def background_variant(self, level):
+        variant = (level.smooth_background, level.background_scale)
+        background = self.backgrounds.get(variant)
+        if background is None:
+            background = self.backgrounds[variant] = self.renderer.prepare_background(BACKGROUND_PATH, *variant)
+        return background
+    
+    def build_backgrounds(self):
+        for level in QUALITY_LEVELS:
+            self.background_variant(level)
+        return False
+    
+    def stream_assets(self):
+        """Run the first deferred startup task for this frame; each returns True until it is finished."""
+        if not self.deferred:
+            return
+        with PROFILER.scope("stream"):
+            if not self.deferred[0]():
+                self.deferred.pop(0)
+                if not self.deferred:
+                    self.startup.mark("streamed")
+                    print(f"startup: deferred assets done {self.startup.total:.2f}s after launch",
+                          file=sys.stderr, flush=True)
+    
+    def apply_quality(self, old_level, level):
+        if level.sprite_scale != old_level.sprite_scale:
+            self.dog_sprite.set_scale(level.sprite_scale)
+        if self.crowd:
+            self.crowd.set_visible_fraction(level.crowd_fraction)
+        changed = (level.smooth_background, level.background_scale) != (old_level.smooth_background, old_level.background_scale)
+        if self.background is not None and changed:
+            # Built on the spot if the switch comes before streaming got to it
+            self.background = self.background_variant(level)
+            if self.dirty_rects:
+                # Dirty-rect mode only restores the background under sprites, so repaint it all once
+                self.all_sprites.clear(self.screen, self.background)
+                self.all_sprites.repaint_rect(self.screen.get_rect())
+    
     def update(self):
+        if self.crowd:
+            self.crowd.update()
         self.all_sprites.update()
+        self.pickups_collected += len(self.scene.resolve(self.dog_sprite))
+        self.dog_sprite.show_current_frame()  # Bumping into something may have sat the dog down
         
-    def draw(self):
-        self.screen.blit(self.background, (0, 0))
-        self.all_sprites.draw(self.screen)
-        pygame.display.flip()
+    def draw(self, alpha=1.0):
+        camera_x = 0
+        if self.world:
+            camera_x = self.world.camera.follow(lerp(self.dog.prev_x, self.dog.x, alpha) + self.dog.width / 2)
+        self.dog_sprite.interpolate(alpha, camera_x)
+        if self.dirty_rects:
+            with PROFILER.scope("draw"):
+                rects = self.all_sprites.draw(self.screen)
+                overlay_rect = self.overlay.draw(self.screen)
+                if overlay_rect:
+                    rects.append(overlay_rect)
+            with PROFILER.scope("flip"):
+                pygame.display.update(rects)
+            self.pixels_pushed = sum(rect.width * rect.height for rect in rects)
+        else:
+            renderer = self.renderer
+            with PROFILER.scope("draw"):
+                if self.world:
+                    renderer.draw_world(self.world)
+                else:
+                    renderer.draw_background(self.background)
+                objects = self.scene.visible(camera_x, SCREEN_WIDTH, SCREEN_HEIGHT)
+                renderer.draw_images([scene_object.image for scene_object in objects],
+                                     [(scene_object.rect.x - int(camera_x), scene_object.rect.y) for scene_object in objects])
+                if self.crowd:
+                    with PROFILER.scope("crowd_draw"):
+                        renderer.draw_images(*self.crowd.draw_list(alpha, camera_x))
+                sprites = self.all_sprites.sprites()
+                renderer.draw_images([sprite.image for sprite in sprites], [sprite.rect.topleft for sprite in sprites])
+                renderer.draw_overlay(self.overlay)
+            with PROFILER.scope("flip"):
+                renderer.present()
+            self.pixels_pushed = SCREEN_WIDTH * SCREEN_HEIGHT
         
     def run(self):
         running = True
         while running:
-            running = self.handle_input()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            frame_start = time.perf_counter()
+            with PROFILER.scope("input"):
+                running = self.handle_input()
+            with PROFILER.scope("update"):
+                self.game_clock.run_updates(self.update)
+            self.game_clock.run_render(self.draw)
+            if not self.first_frame_shown:
+                self.first_frame_shown = True
+                self.startup.mark("first frame")
+                self.startup.report()
+            self.stream_assets()
+            work = time.perf_counter() - frame_start
+            self.clock.tick(self.governor.level.fps)
+            self.governor.observe(work)
+            PROFILER.end_frame()
             
 def main():
-    is_mac = '--mac' in sys.argv
-    game = Game(is_mac)
+    dirty_rects = '--dirty' in sys.argv
+    scrolling = '--scroll' in sys.argv
+    crowd_size = 0
+    quality = "auto"
+    renderer = "auto"
+    profile_path = profiler.configure(sys.argv)
+    for arg in sys.argv:
+        if arg.startswith('--crowd='):
+            crowd_size = int(arg.split('=', 1)[1])
+        elif arg.startswith('--renderer='):
+            renderer = arg.split('=', 1)[1]
+        elif arg.startswith('--quality='):
+            quality = arg.split('=', 1)[1]
+    input_backend = create_input(input_spec(sys.argv))
+    game = Game(input_backend, dirty_rects, crowd_size, scrolling, '--profile' in sys.argv, quality, renderer)
     game.run()
+    if profile_path:
+        PROFILER.dump(profile_path)
+    input_backend.stop()
     pygame.quit()
 
 if __name__ == "__main__":
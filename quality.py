@@ -0,0 +1,102 @@
+"""Adaptive quality: steps render settings down when frames run over budget and back up when there is room."""
+import sys
+import time
+from collections import namedtuple
+
+# fps: render rate cap; sprite_scale: must be one of the scales prebuilt at startup;
+# smooth_background: smooth vs nearest filtering of the background; background_scale: fraction of the
+# window's resolution the background is prebuilt at; crowd_fraction: crowd dogs drawn
+QualityLevel = namedtuple("QualityLevel", "name fps sprite_scale smooth_background background_scale crowd_fraction")
+
+QUALITY_LEVELS = (
+    QualityLevel("high", 60, 3.2, True, 1.0, 1.0),
+    QualityLevel("medium", 45, 2.6, True, 1.0, 0.6),
+    QualityLevel("low", 30, 2.0, False, 0.5, 0.35),
+    QualityLevel("minimal", 24, 2.0, False, 0.5, 0.2),
+)
+WINDOW_FRAMES = 30  # Frames averaged before each decision
+DOWNGRADE_LOAD = 0.9  # Drop a level when work takes more than this fraction of the frame budget
+UPGRADE_LOAD = 0.6  # Raise a level when work would take less than this fraction of the higher level's budget
+UPGRADE_WINDOWS = 5  # Consecutive quiet windows needed before raising
+HOLD_FRAMES = 120  # Frames to stay at a level after any change
+MODEL_PATH = "/proc/device-tree/model"
+
+
+def hardware_model():
+    """Return the board name the Pi firmware reports, or None on other machines."""
+    try:
+        with open(MODEL_PATH) as f:
+            return f.read().strip("\0\n ")
+    except OSError:
+        return None
+
+
+def level_by_name(name, levels=QUALITY_LEVELS):
+    for index, level in enumerate(levels):
+        if level.name == name:
+            return index
+    raise ValueError(f"Unknown quality level {name!r}, expected one of {', '.join(level.name for level in levels)}")
+
+
+class QualityGovernor:
+    def __init__(self, levels=QUALITY_LEVELS, start=0, adaptive=True, on_change=None):
+        self.levels = levels
+        self.index = start
+        self.adaptive = adaptive
+        self.on_change = on_change  # Called with (old_level, new_level) after every transition
+        self.window_work = 0.0
+        self.window_count = 0
+        self.quiet_windows = 0
+        self.hold = HOLD_FRAMES
+        self.transitions = []  # (seconds since start, from name, to name, average work in ms)
+        self.started = time.monotonic()
+        model = hardware_model() or "unknown hardware"
+        self.log(f"starting at {self.level.name} on {model}" + ("" if adaptive else " (fixed)"))
+
+    @staticmethod
+    def log(message):
+        # stderr, so tools that print results on stdout (benchmark.py) stay parseable
+        print(f"quality: {message}", file=sys.stderr, flush=True)
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def observe(self, work_seconds):
+        """Record one frame's work time and switch level if the window calls for it."""
+        if not self.adaptive:
+            return
+        self.window_work += work_seconds
+        self.window_count += 1
+        if self.hold:
+            self.hold -= 1
+        if self.window_count < WINDOW_FRAMES:
+            return
+
+        average = self.window_work / self.window_count
+        self.window_work = 0.0
+        self.window_count = 0
+        if self.hold:
+            return
+
+        if average > DOWNGRADE_LOAD / self.level.fps and self.index + 1 < len(self.levels):
+            self.quiet_windows = 0
+            self._switch(self.index + 1, average)
+        elif self.index > 0 and average < UPGRADE_LOAD / self.levels[self.index - 1].fps:
+            self.quiet_windows += 1
+            if self.quiet_windows >= UPGRADE_WINDOWS:
+                self.quiet_windows = 0
+                self._switch(self.index - 1, average)
+        else:
+            self.quiet_windows = 0
+
+    def _switch(self, index, average):
+        old = self.level
+        self.index = index
+        self.hold = HOLD_FRAMES
+        elapsed = time.monotonic() - self.started
+        self.transitions.append((elapsed, old.name, self.level.name, average * 1000.0))
+        self.log(f"{old.name} -> {self.level.name} after {elapsed:.1f}s "
+                 f"(frame work {average * 1000.0:.1f} ms, budget {1000.0 / old.fps:.1f} ms)")
+        if self.on_change:
+            self.on_change(old, self.level)
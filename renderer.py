@@ -0,0 +1,292 @@
+"""Render backends for pygame_demo: software blits to the display surface, or SDL2 textures."""
+import os
+import time
+from collections import deque
+
+import pygame
+
+import sprite_loader
+from world import CHUNK_WIDTH
+
+RENDERERS = ("auto", "software", "texture")
+
+
+class StreamedCache:
+    """Builds its entries from a sliced sheet on first use, or ahead of need with `stream()`.
+
+    A game can build the rows it shows first with `preload()`, put up its first frame, and
+    let `stream()` build the rest a time budget per frame at a time.
+    """
+
+    def __init__(self, keys, build):
+        self.built = {}
+        self.pending = deque(keys)  # Keys not built yet, in the order stream() builds them
+        self.build = build  # Called with a key to make its entry
+
+    def entry(self, key):
+        value = self.built.get(key)
+        if value is None:
+            value = self.built[key] = self.build(key)
+        return value
+
+    def preload(self, states):
+        """Build every entry of the given states now."""
+        for key in self.pending:
+            if key[0] in states:
+                self.entry(key)
+
+    def stream(self, budget=None):
+        """Build pending entries for up to `budget` seconds, or all of them; returns True while some remain."""
+        deadline = None if budget is None else time.perf_counter() + budget
+        while self.pending:
+            key = self.pending.popleft()
+            if key not in self.built:
+                self.entry(key)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return bool(self.pending)
+
+
+class FrameCache(StreamedCache):
+    """Scaled, flipped, display-format frames keyed by (state, frame, facing, scale), with their hitboxes and masks."""
+
+    def __init__(self, sheet, scales):
+        super().__init__([(state, frame, facing, scale) for state, frame, facing, _ in sheet.frames for scale in scales],
+                         self.build_frame)
+        self.sheet = sheet
+        self.frames = self.built
+        self.frame_counts = dict(sheet.frame_counts)
+        self.shapes = sprite_loader.FrameShapes(sheet)
+
+    def build_frame(self, key):
+        # Slicing and flipping came from sprite_loader's on-disk cache; scaling and the
+        # conversion to the display's pixel format happen here
+        state, frame, facing, scale = key
+        surface = sprite_loader.to_pygame_surface(self.sheet.frames[(state, frame, facing, 1.0)], convert=False)
+        if scale != 1.0:
+            surface = pygame.transform.scale(surface, (int(surface.get_width() * scale), int(surface.get_height() * scale)))
+        return surface.convert_alpha()
+
+    def get(self, state, frame, facing_right, scale):
+        return self.entry((state, frame, "right" if facing_right else "left", scale))
+
+
+def load_frame_cache(sprite_sheet_path, states_columns, sprite_width, sprite_height, scales, preload=None):
+    """Return a FrameCache for the sheet; with `preload`, only those states are built now and the rest is left to stream()."""
+    sheet = sprite_loader.load_sheet(sprite_sheet_path, states_columns, sprite_width, sprite_height)
+    frame_cache = FrameCache(sheet, scales)
+    if preload is None:
+        frame_cache.stream()
+    else:
+        frame_cache.preload(preload)
+    return frame_cache
+
+
+class TextureFrame:
+    """A texture drawn at a given size and facing; stands in for a Surface as a sprite image."""
+
+    def __init__(self, texture, width, height, flip_x):
+        self.texture = texture
+        self.width = width
+        self.height = height
+        self.flip_x = flip_x
+
+    def get_width(self):
+        return self.width
+
+    def get_height(self):
+        return self.height
+
+    def get_size(self):
+        return self.width, self.height
+
+    def get_rect(self, **kwargs):
+        rect = pygame.Rect(0, 0, self.width, self.height)
+        for name, value in kwargs.items():
+            setattr(rect, name, value)
+        return rect
+
+
+class TextureFrameCache(StreamedCache):
+    """Same lookups as FrameCache, but every scale and facing shares one texture per frame."""
+
+    def __init__(self, renderer, sheet, sprite_width, sprite_height, scales):
+        # Only the right-facing frames at sheet size are uploaded, keyed by (state, frame)
+        super().__init__(((state, frame) for state, frame, facing, scale in sheet.frames if facing == "right"),
+                         self.build_texture)
+        self.renderer = renderer
+        self.sheet = sheet
+        self.textures = self.built
+        self.frame_counts = dict(sheet.frame_counts)
+        self.sprite_width = sprite_width
+        self.sprite_height = sprite_height
+        self.frames = {}  # Memoized TextureFrames; they only describe how to draw a texture
+        # Shapes at the drawn sizes, stretched from the sheet-size frames like the textures are
+        self.shapes = sprite_loader.FrameShapes(sheet)
+
+    def build_texture(self, key):
+        state, frame = key
+        pixels = self.sheet.frames[(state, frame, "right", 1.0)]
+        return self.renderer.texture(sprite_loader.to_pygame_surface(pixels, convert=False))
+
+    def get(self, state, frame, facing_right, scale):
+        key = (state, frame, facing_right, scale)
+        image = self.frames.get(key)
+        if image is None:
+            image = self.frames[key] = TextureFrame(
+                self.entry((state, frame)),
+                int(self.sprite_width * scale),
+                int(self.sprite_height * scale),
+                not facing_right,
+            )
+        return image
+
+
+class SoftwareRenderer:
+    name = "software"
+    converts_surfaces = True  # Surfaces can be converted to the display format
+
+    def __init__(self, size, caption):
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        self.size = size
+
+    def load_frames(self, sprite_sheet_path, states_columns, sprite_width, sprite_height, scales, preload=None):
+        return load_frame_cache(sprite_sheet_path, states_columns, sprite_width, sprite_height, scales, preload)
+
+    def prepare_background(self, path, smooth, scale=1.0):
+        # Scaled once and kept in sprite_loader's disk cache, so later starts skip the PNG decode;
+        # a reduced resolution is stretched back to the window here, once, rather than on every blit
+        surface = pygame.image.frombuffer(*background_pixels(path, self.size, smooth, scale))
+        if surface.get_size() != self.size:
+            surface = (pygame.transform.smoothscale if smooth else pygame.transform.scale)(surface, self.size)
+        return surface.convert()
+
+    def load_image(self, surface):
+        """Return `surface` in the form draw_images() takes."""
+        return surface.convert_alpha()
+
+    def draw_background(self, background):
+        self.screen.blit(background, (0, 0))
+
+    def draw_world(self, world):
+        world.draw(self.screen)
+
+    def draw_images(self, images, positions):
+        self.screen.blits(zip(images, positions), doreturn=False)
+
+    def draw_overlay(self, overlay):
+        overlay.draw(self.screen)
+
+    def present(self):
+        pygame.display.flip()
+
+
+class TextureRenderer:
+    name = "texture"
+    converts_surfaces = False  # No display surface exists, so nothing can be converted to its format
+    screen = None
+
+    def __init__(self, size, caption, accelerated=True):
+        from pygame._sdl2.video import Renderer, Window
+
+        self.size = size
+        self.window = Window(caption, size)
+        try:
+            # accelerated=1 refuses SDL's software render driver instead of silently using it
+            self.renderer = Renderer(self.window, accelerated=1 if accelerated else -1)
+        except Exception:
+            self.window.destroy()
+            raise
+        self.world_textures = {}  # Source image path -> Texture
+        self.overlay_surface = None
+        self.overlay_texture = None
+
+    def texture(self, surface, smooth=False):
+        from pygame._sdl2.video import Texture
+
+        # SDL picks a texture's filtering when it is created, from this hint
+        os.environ["SDL_RENDER_SCALE_QUALITY"] = "linear" if smooth else "nearest"
+        return Texture.from_surface(self.renderer, surface)
+
+    def load_frames(self, sprite_sheet_path, states_columns, sprite_width, sprite_height, scales, preload=None):
+        # The scales are applied when drawing
+        sheet = sprite_loader.load_sheet(sprite_sheet_path, states_columns, sprite_width, sprite_height)
+        frame_cache = TextureFrameCache(self, sheet, sprite_width, sprite_height, scales)
+        if preload is None:
+            frame_cache.stream()
+        else:
+            frame_cache.preload(preload)
+        return frame_cache
+
+    def prepare_background(self, path, smooth, scale=1.0):
+        # Uploaded at the level's resolution and stretched to the window, filtered to match, on every draw
+        return self.texture(pygame.image.frombuffer(*background_pixels(path, self.size, smooth, scale)), smooth)
+
+    def load_image(self, surface):
+        return TextureFrame(self.texture(surface), surface.get_width(), surface.get_height(), False)
+
+    def draw_background(self, background):
+        background.draw(dstrect=(0, 0) + tuple(self.size))
+
+    def draw_world(self, world):
+        camera_x = world.camera.x
+        for layer in world.layers:
+            layer.prepare(world.cache)
+            texture = self.world_textures.get(layer.image_path)
+            if texture is None:
+                texture = self.world_textures[layer.image_path] = self.texture(layer.source(world.cache))
+            # The same whole-chunk repeat length as the software path, so both scroll identically
+            repeat_width = layer.loop_chunks * CHUNK_WIDTH
+            source_rect = (0, int(texture.height * layer.source_top), texture.width,
+                           int(texture.height * layer.source_height))
+            x = -(int(camera_x * layer.factor) % repeat_width)
+            while x < world.view_width:
+                texture.draw(srcrect=source_rect, dstrect=(x, layer.y, repeat_width, layer.height))
+                x += repeat_width
+
+    def draw_images(self, images, positions):
+        for image, (x, y) in zip(images, positions):
+            image.texture.draw(dstrect=(x, y, image.width, image.height), flip_x=image.flip_x)
+
+    def draw_overlay(self, overlay):
+        surface = overlay.current_surface()
+        if surface is None:
+            return
+        if surface is not self.overlay_surface:
+            # The overlay re-renders only every few frames; upload only then
+            self.overlay_surface = surface
+            self.overlay_texture = self.texture(surface)
+        self.overlay_texture.draw(dstrect=overlay.rect)
+
+    def present(self):
+        # No clear: the background or the world's layers cover the whole window every frame
+        self.renderer.present()
+
+
+def background_pixels(path, window_size, smooth, scale):
+    """Return frombuffer() arguments for `path` prescaled to `scale` times the window size."""
+    size = (max(1, int(window_size[0] * scale)), max(1, int(window_size[1] * scale)))
+    width, height, pixels = sprite_loader.load_scaled_image(path, size, smooth)
+    return pixels, (width, height), "RGBA"
+
+
+def create_renderer(size, caption, backend="auto"):
+    """Return a renderer for `backend`.
+
+    "auto" uses textures when SDL has a hardware-accelerated render driver and falls back to
+    software otherwise (always under the dummy video driver). "texture" forces the texture
+    backend even on SDL's own software render driver.
+    """
+    if backend not in RENDERERS:
+        raise ValueError(f"Unknown renderer {backend!r}, expected one of {', '.join(RENDERERS)}")
+    if backend != "software":
+        pygame.display.init()
+        # The dummy driver (headless runs, benchmarks) has no GPU; don't even try there
+        if backend == "texture" or pygame.display.get_driver() != "dummy":
+            try:
+                return TextureRenderer(size, caption, accelerated=backend == "auto")
+            except Exception:
+                if backend == "texture":
+                    raise
+    return SoftwareRenderer(size, caption)
@@ -0,0 +1,246 @@
+"""Shared-memory sensor bus: one daemon owns the Build HAT and other processes read its samples.
+
+    python sensor_bus.py --ports=AB --rate=100    # or --replay=session.mtlg / --synthetic
+"""
+import mmap
+import os
+import signal
+import struct
+import sys
+import tempfile
+import time
+
+from build_hat_controller import PORTS, HatController
+from telemetry import LOG_RECORD, absolute_position
+
+BUS_PATH = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "rpi-lcd-sensor-bus")
+BUS_MAGIC = b"SBUS"
+BUS_VERSION = 1
+RING_CAPACITY = 1024  # Samples kept per port
+DAEMON_RATE_HZ = 100  # Default rate the daemon reads each port at
+STALE_AFTER = 1.0  # Seconds without a heartbeat, or without a port's sample, before readers treat it as gone
+MIN_RATE_HZ = 4 / STALE_AFTER  # Slowest daemon rate that still beats well within STALE_AFTER
+BUS_HEADER = struct.Struct("<4sIIId")  # magic, version, ring capacity, daemon pid, heartbeat (monotonic seconds)
+PORT_HEADER = struct.Struct("<Qd")  # samples written, sample rate (0 while the port is not published)
+RECORD = LOG_RECORD  # timestamp, position, speed; the same packing as telemetry logs
+SEQ = struct.Struct("<Q")
+HEARTBEAT = struct.Struct("<d")
+HEARTBEAT_OFFSET = BUS_HEADER.size - HEARTBEAT.size
+
+
+def port_offset(port, capacity):
+    return BUS_HEADER.size + PORTS.index(port) * (PORT_HEADER.size + capacity * RECORD.size)
+
+
+def bus_size(capacity):
+    return port_offset(PORTS[-1], capacity) + PORT_HEADER.size + capacity * RECORD.size
+
+
+class SensorBusWriter:
+    """The daemon's side: owns the bus file and appends samples to the port rings."""
+
+    def __init__(self, path=BUS_PATH, capacity=RING_CAPACITY):
+        reader = SensorBusReader.attach(path)
+        if reader is not None:
+            pid = reader.pid
+            reader.close()
+            raise RuntimeError(f"A sensor daemon (pid {pid}) is already publishing to {path}")
+        self.path = path
+        self.capacity = capacity
+        # A dead daemon's file may still be mapped by readers: replace it rather than truncate it under them
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        with open(path, "w+b") as f:
+            f.truncate(bus_size(capacity))
+            self.buffer = mmap.mmap(f.fileno(), 0)
+        BUS_HEADER.pack_into(self.buffer, 0, BUS_MAGIC, BUS_VERSION, capacity, os.getpid(), time.monotonic())
+
+    def set_rate(self, port, rate_hz):
+        PORT_HEADER.pack_into(self.buffer, port_offset(port, self.capacity), 0, rate_hz)
+
+    def publish(self, port, timestamp, position, speed):
+        """Append one sample and refresh the heartbeat; a sample listener for HatController's MotorSamplers."""
+        offset = port_offset(port, self.capacity)
+        count = SEQ.unpack_from(self.buffer, offset)[0]
+        RECORD.pack_into(self.buffer, offset + PORT_HEADER.size + (count % self.capacity) * RECORD.size,
+                         timestamp, position, speed)
+        # Publish only once the record is complete
+        SEQ.pack_into(self.buffer, offset, count + 1)
+        HEARTBEAT.pack_into(self.buffer, HEARTBEAT_OFFSET, timestamp)
+
+    def close(self):
+        self.buffer.close()
+        os.unlink(self.path)
+
+
+class SensorBusReader:
+    """A client's side: reads the daemon's rings in place, without copying the file or taking locks."""
+
+    def __init__(self, path=BUS_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.capacity, self.pid, _ = BUS_HEADER.unpack_from(self.buffer, 0)
+        if magic != BUS_MAGIC or version != BUS_VERSION or len(self.buffer) != bus_size(self.capacity):
+            self.buffer.close()
+            raise ValueError(f"{path} is not a sensor bus")
+
+    @classmethod
+    def attach(cls, path=BUS_PATH):
+        """Return a reader for a live daemon's bus, or None when no daemon is publishing."""
+        try:
+            reader = cls(path)
+        except (OSError, ValueError):
+            return None
+        if not reader.alive():
+            reader.close()
+            return None
+        return reader
+
+    def alive(self):
+        return time.monotonic() - HEARTBEAT.unpack_from(self.buffer, HEARTBEAT_OFFSET)[0] < STALE_AFTER
+
+    def rate_hz(self, port):
+        """The rate the daemon samples `port` at, or 0 when it does not publish that port."""
+        return PORT_HEADER.unpack_from(self.buffer, port_offset(port, self.capacity))[1]
+
+    def latest(self, port):
+        """Return (sample count, timestamp, position, speed) of the newest sample, or None before the first."""
+        offset = port_offset(port, self.capacity)
+        while True:
+            count = SEQ.unpack_from(self.buffer, offset)[0]
+            if not count:
+                return None
+            record = RECORD.unpack_from(self.buffer, offset + PORT_HEADER.size + ((count - 1) % self.capacity) * RECORD.size)
+            # Only a daemon that lapped the whole ring while we read could have torn the record
+            if SEQ.unpack_from(self.buffer, offset)[0] - count < self.capacity - 1:
+                return (count,) + record
+
+    def history(self, port, limit=None):
+        """Return up to `limit` recent samples as (timestamp, position, speed), oldest first."""
+        offset = port_offset(port, self.capacity)
+        records = offset + PORT_HEADER.size
+        while True:
+            count = SEQ.unpack_from(self.buffer, offset)[0]
+            # The slot after the newest sample may be mid-write, so at most capacity - 1 are readable
+            available = min(count, self.capacity - 1 if limit is None else min(limit, self.capacity - 1))
+            samples = [RECORD.unpack_from(self.buffer, records + (index % self.capacity) * RECORD.size)
+                       for index in range(count - available, count)]
+            # Retry if the daemon wrapped over the oldest sample we copied
+            if SEQ.unpack_from(self.buffer, offset)[0] - (count - available) < self.capacity:
+                return samples
+
+    def motors(self):
+        """Motor stand-ins for every port, for a HatController that reads through the bus."""
+        return {port: BusMotor(self, port) for port in PORTS}
+
+    def close(self):
+        self.buffer.close()
+
+
+class BusMotor:
+    """Reads one port's newest sample from the bus through the buildhat.Motor reading API.
+
+    Raises RuntimeError once the daemon or its port stops producing samples, rather than
+    returning the last one forever; a daemon restarted at the same path is reattached.
+    """
+
+    def __init__(self, reader, port):
+        self.reader = reader
+        self.port = port
+
+    def _latest(self):
+        if not self.reader.alive():
+            reader = SensorBusReader.attach(self.reader.path)
+            if reader is None:
+                raise RuntimeError(f"The sensor daemon stopped publishing to {self.reader.path}")
+            self.reader.close()
+            self.reader = reader
+        latest = self.reader.latest(self.port)
+        if latest is None:
+            if not self.reader.rate_hz(self.port):
+                raise RuntimeError(f"The sensor daemon does not publish port {self.port}")
+            # Published but not sampled yet: wait for the first sample
+            deadline = time.monotonic() + STALE_AFTER
+            while latest is None:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"The sensor daemon has not sampled port {self.port} yet")
+                time.sleep(0.001)
+                latest = self.reader.latest(self.port)
+        elif time.monotonic() - latest[1] > STALE_AFTER:
+            # The daemon is alive through its other ports, but this one has stopped
+            raise RuntimeError(f"The sensor daemon has not sampled port {self.port} for {STALE_AFTER:g} s")
+        return latest
+
+    def get(self):
+        _, _, position, speed = self._latest()
+        return [speed, position, absolute_position(position)]
+
+    def get_position(self):
+        return self._latest()[2]
+
+    def get_speed(self):
+        return self._latest()[3]
+
+    def get_aposition(self):
+        return absolute_position(self._latest()[2])
+
+
+def main():
+    ports = "A"
+    rate_hz = DAEMON_RATE_HZ
+    source = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--ports='):
+            ports = arg.split('=', 1)[1].upper()
+        elif arg.startswith('--rate='):
+            rate_hz = float(arg.split('=', 1)[1])
+        elif arg.startswith('--replay='):
+            from telemetry import ReplayMotor
+            source = ReplayMotor(arg.split('=', 1)[1])
+        elif arg == '--synthetic':
+            from input_backends import SyntheticMotor
+            source = SyntheticMotor()
+    unknown = sorted(set(ports) - set(PORTS))
+    if unknown or not ports:
+        raise ValueError(f"--ports takes letters from {''.join(PORTS)}, not {ports!r}")
+    if rate_hz < MIN_RATE_HZ:
+        raise ValueError(f"--rate must be at least {MIN_RATE_HZ:g} Hz, or readers take the daemon for dead")
+    motors = {}
+    if source is not None:
+        # One replayed or synthetic wheel feeds one port, whichever --ports names
+        if len(ports) != 1:
+            raise ValueError("--replay and --synthetic feed a single port; name it with --ports")
+        motors[ports] = source
+
+    # SIGTERM unwinds like Ctrl-C, so the bus file is removed either way
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    controller = HatController(motors)
+    writer = SensorBusWriter()
+    opened = []
+    try:
+        for port in ports:
+            sampler = controller.open(port, rate_hz)
+            opened.append(port)
+            writer.set_rate(port, rate_hz)
+            sampler.sample_listeners.append(lambda timestamp, position, speed, port=port:
+                                            writer.publish(port, timestamp, position, speed))
+        print(f"sensor bus: publishing port(s) {', '.join(ports)} at {rate_hz:g} Hz to {writer.path}",
+              file=sys.stderr, flush=True)
+        # The samples are the heartbeat; this thread only notices when sampling has stopped for good
+        while controller.running:
+            time.sleep(STALE_AFTER / 4)
+        print("sensor bus: sampling stopped, exiting", file=sys.stderr, flush=True)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for port in opened:
+            controller.release(port)
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
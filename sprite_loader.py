@@ -0,0 +1,262 @@
+"""Slices the corgi sprite sheets once and keeps the frames, bounds and masks in an mmapped disk cache."""
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import struct
+
+FIRST_COL_WIDTH = 100
+SPRITE_WIDTH = 64
+SPRITE_HEIGHT = 64
+STATES_COLUMNS = {
+    "jump": 11,
+    "idle1": 5,
+    "idle2": 5,
+    "sit": 9,
+    "walk": 5,
+    "run": 8,
+    "sniff": 8,
+    "sniff_walk": 8,
+}
+FACINGS = ("right", "left")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "sprites")
+CACHE_MAGIC = b"CRGI"
+CACHE_VERSION = 3
+HEADER = struct.Struct("<4sII")  # magic, version, index length
+MASK_THRESHOLD = 127  # Pixels with more alpha than this are solid, as in pygame.mask.from_surface
+# pygame stores mask bits in native unsigned longs, so the cached bits only fit this word size
+MASK_WORD_SIZE = struct.calcsize("L")
+
+
+class SlicedSheet:
+    """Raw RGBA frames keyed by (state, frame, facing, scale), backed by the mmapped cache."""
+
+    def __init__(self, path, index, buffer, data_offset):
+        self.path = path
+        self.buffer = buffer  # Keeps the mmap alive while views into it are in use
+        self.frames = {}
+        self.bounds = {}  # Same keys -> (x, y, width, height) of the frame's solid pixels
+        self.mask_bits = {}  # Same keys -> the frame's collision mask, as pygame lays out its bits
+        self.frame_counts = {}
+        view = memoryview(buffer)
+        for state, frame, facing, scale, width, height, offset, bounds, mask_offset in index["frames"]:
+            key = (state, frame, facing, scale)
+            start = data_offset + offset
+            self.frames[key] = (width, height, view[start:start + width * height * 4])
+            self.bounds[key] = tuple(bounds)
+            if mask_offset is not None:
+                self.mask_bits[key] = view[data_offset + mask_offset:]  # Read up to the mask's own length
+            self.frame_counts[state] = max(self.frame_counts.get(state, 0), frame + 1)
+
+    def states(self):
+        return list(self.frame_counts)
+
+    def mask(self, key):
+        """Return a pygame Mask of the frame's solid pixels, filled from the cached bits."""
+        import pygame
+
+        width, height, _ = self.frames[key]
+        mask = pygame.mask.Mask((width, height))
+        bits = memoryview(mask).cast("B")
+        bits[:] = self.mask_bits[key][:len(bits)]
+        return mask
+
+
+def cache_key(path, states_columns, sprite_width, sprite_height):
+    layout = [CACHE_VERSION, FIRST_COL_WIDTH, sprite_width, sprite_height, list(states_columns.items()), MASK_WORD_SIZE]
+    return file_key(path, layout)
+
+
+def file_key(path, layout):
+    """Hash of the file's contents plus whatever describes how it was processed."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        digest.update(f.read())
+    digest.update(json.dumps(layout).encode())
+    return digest.hexdigest()
+
+
+def cache_path_for(cache_dir, name, key):
+    return os.path.join(cache_dir, f"{name}-{key[:16]}.bin")
+
+
+def remove_stale_caches(cache_path):
+    """Delete the other cache files with the same name: builds for an older sheet, layout or CACHE_VERSION."""
+    cache_dir, file_name = os.path.split(cache_path)
+    stale = re.compile(re.escape(file_name[:-len("-0123456789abcdef.bin")]) + r"-[0-9a-f]{16}\.bin")
+    for other in os.listdir(cache_dir):
+        if other != file_name and stale.fullmatch(other):
+            try:
+                os.remove(os.path.join(cache_dir, other))
+            except OSError:
+                pass  # Another process got to it first
+
+
+def slice_sheet(path, states_columns, sprite_width, sprite_height):
+    """Decode the sheet and return (index entries, pixel and mask bytes) for every frame."""
+    import pygame
+
+    sheet = pygame.image.load(path)
+    entries = []
+    chunks = []
+    offset = 0
+    for row, (state, columns) in enumerate(states_columns.items()):
+        for col in range(1, columns):  # Column 0 is the wider label column
+            x = FIRST_COL_WIDTH + (col - 1) * sprite_width
+            y = row * sprite_height
+            frame = pygame.Surface((sprite_width, sprite_height), pygame.SRCALPHA)
+            frame.blit(sheet, (0, 0), (x, y, sprite_width, sprite_height))
+            for facing in FACINGS:
+                oriented = frame if facing == "right" else pygame.transform.flip(frame, True, False)
+                pixels = pygame.image.tobytes(oriented, "RGBA")
+                bounds = oriented.get_bounding_rect(MASK_THRESHOLD + 1)
+                mask_bits = bytes(memoryview(pygame.mask.from_surface(oriented, MASK_THRESHOLD)))
+                entries.append([state, col - 1, facing, 1.0, sprite_width, sprite_height, offset, list(bounds),
+                                offset + len(pixels)])
+                chunks += (pixels, mask_bits)
+                offset += len(pixels) + len(mask_bits)
+    return entries, b"".join(chunks)
+
+
+def write_cache(cache_path, key, entries, pixels):
+    index = json.dumps({"key": key, "frames": entries}).encode()
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Write to a temporary file of our own first, so neither a kiosk reboot mid-write nor another
+    # process building the same cache at once (the sensor daemon and a game) leaves a torn file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(index)))
+            f.write(index)
+            f.write(pixels)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    remove_stale_caches(cache_path)
+
+
+def read_cache(path, cache_path, key):
+    with open(cache_path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, index_length = HEADER.unpack_from(buffer, 0)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        buffer.close()
+        return None
+    index = json.loads(buffer[HEADER.size:HEADER.size + index_length])
+    if index["key"] != key:
+        buffer.close()
+        return None
+    return SlicedSheet(path, index, buffer, HEADER.size + index_length)
+
+
+def load_sheet(path, states_columns=STATES_COLUMNS, sprite_width=SPRITE_WIDTH, sprite_height=SPRITE_HEIGHT,
+               cache_dir=CACHE_DIR):
+    """Return a SlicedSheet of `path`'s frames at sheet size, building the on-disk cache on first use."""
+    key = cache_key(path, states_columns, sprite_width, sprite_height)
+    cache_path = cache_path_for(cache_dir, os.path.splitext(os.path.basename(path))[0], key)
+
+    if os.path.exists(cache_path):
+        sheet = read_cache(path, cache_path, key)
+        if sheet is not None:
+            return sheet
+
+    entries, pixels = slice_sheet(path, states_columns, sprite_width, sprite_height)
+    write_cache(cache_path, key, entries, pixels)
+    return read_cache(path, cache_path, key)
+
+
+def load_scaled_image(path, size, smooth=False, cache_dir=CACHE_DIR):
+    """Return `path` scaled to `size` as a (width, height, RGBA pixels) frame, cached on disk like sheets.
+
+    A full-screen background is decoded and resampled once; later starts read the scaled
+    pixels straight from the mmapped cache.
+    """
+    key = file_key(path, [CACHE_VERSION, "image", list(size), smooth])
+    # Both smoothings are in use at once (quality levels switch between them), so each has its own name
+    base = os.path.splitext(os.path.basename(path))[0]
+    cache_path = cache_path_for(cache_dir, f"{base}-{size[0]}x{size[1]}-{'smooth' if smooth else 'sharp'}", key)
+
+    image = read_cache(path, cache_path, key) if os.path.exists(cache_path) else None
+    if image is None:
+        import pygame
+
+        source = pygame.image.load(path)
+        scaled = (pygame.transform.smoothscale if smooth else pygame.transform.scale)(source, size)
+        pixels = pygame.image.tobytes(scaled, "RGBA")
+        write_cache(cache_path, key, [["image", 0, "right", 1.0, size[0], size[1], 0, [0, 0, *size], None]], pixels)
+        # Images used to be cached under the bare file name
+        remove_stale_caches(cache_path_for(cache_dir, base, key))
+        image = read_cache(path, cache_path, key)
+    return image.frames[("image", 0, "right", 1.0)]
+
+
+class FrameShapes:
+    """Hitboxes and collision masks of a sheet's frames, at the size each scale draws them.
+
+    A hitbox is the tight box around the frame's solid pixels, relative to the frame's
+    top-left corner, as is the mask, which covers the whole frame. Each state's shapes at a
+    scale are built together the first time one of them is looked up.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.shapes = {}  # (state, frame, facing_right, scale) -> (mask, hitbox)
+
+    def get(self, state, frame, facing_right, scale):
+        """Return (mask, hitbox) of a frame, keyed like the frame caches' get()."""
+        shape = self.shapes.get((state, frame, facing_right, scale))
+        if shape is None:
+            self.build(state, scale)
+            shape = self.shapes[(state, frame, facing_right, scale)]
+        return shape
+
+    def build(self, state, scale):
+        import pygame
+
+        sheet = self.sheet
+        for frame in range(sheet.frame_counts[state]):
+            for facing in FACINGS:
+                key = (state, frame, facing, scale)
+                if key in sheet.frames:
+                    mask = sheet.mask(key)
+                    x, y, width, height = sheet.bounds[key]
+                else:
+                    # Drawn stretched from the sheet-size frame (a scaled copy, or a texture the
+                    # GPU stretches): scale its mask the same way, and its box to the pixels that cover it
+                    source = (state, frame, facing, 1.0)
+                    frame_width, frame_height, _ = sheet.frames[source]
+                    size = (int(frame_width * scale), int(frame_height * scale))
+                    mask = sheet.mask(source).scale(size)
+                    left, top, box_width, box_height = sheet.bounds[source]
+                    x = math.ceil(left * size[0] / frame_width)
+                    y = math.ceil(top * size[1] / frame_height)
+                    width = math.ceil((left + box_width) * size[0] / frame_width) - x
+                    height = math.ceil((top + box_height) * size[1] / frame_height) - y
+                self.shapes[(state, frame, facing == "right", scale)] = (mask, pygame.Rect(x, y, width, height))
+
+
+def to_pygame_surface(frame, convert=True):
+    """Wrap a cached frame in a pygame Surface.
+
+    With `convert` (needs a display mode set) it is copied into the display's pixel format;
+    without, the Surface reads the cache's RGBA bytes directly, e.g. to upload as a texture.
+    """
+    import pygame
+
+    width, height, pixels = frame
+    surface = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+    return surface.convert_alpha() if convert else surface
+
+
+def to_arcade_texture(name, frame):
+    """Wrap a cached frame in an arcade.Texture."""
+    import arcade
+    from PIL import Image
+
+    width, height, pixels = frame
+    image = Image.frombytes("RGBA", (width, height), bytes(pixels))
+    return arcade.Texture(name, image=image)
@@ -0,0 +1,172 @@
+"""Motor telemetry: a fixed-size sample ring, a compact binary log, and a replay motor."""
+import struct
+import time
+from array import array
+
+RING_CAPACITY = 4096
+LOG_MAGIC = b"MTLG"
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct("<4sI")  # magic, version
+LOG_RECORD = struct.Struct("<dii")  # timestamp (s), position (deg), speed
+LOG_FLUSH_RECORDS = 256  # Records buffered in memory before each write
+
+
+class TelemetryRing:
+    """Preallocated circular buffer of the most recent samples."""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.positions = array("i", bytes(4 * capacity))
+        self.speeds = array("i", bytes(4 * capacity))
+        self.head = 0  # Index the next sample is written to
+        self.count = 0
+
+    def append(self, timestamp, position, speed):
+        head = self.head
+        self.timestamps[head] = timestamp
+        self.positions[head] = position
+        self.speeds[head] = speed
+        self.head = (head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self):
+        index = (self.head - 1) % self.capacity
+        return self.timestamps[index], self.positions[index], self.speeds[index]
+
+    def snapshot(self):
+        """Return (timestamps, positions, speeds) arrays, oldest sample first."""
+        start = (self.head - self.count) % self.capacity
+        order = [(start + i) % self.capacity for i in range(self.count)]
+        return (
+            array("d", (self.timestamps[i] for i in order)),
+            array("i", (self.positions[i] for i in order)),
+            array("i", (self.speeds[i] for i in order)),
+        )
+
+
+class TelemetryLog:
+    """Appends packed samples to a binary log file."""
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+        self.buffer = bytearray(LOG_RECORD.size * LOG_FLUSH_RECORDS)
+        self.buffered = 0
+
+    def write(self, timestamp, position, speed):
+        LOG_RECORD.pack_into(self.buffer, self.buffered * LOG_RECORD.size, timestamp, position, speed)
+        self.buffered += 1
+        if self.buffered == LOG_FLUSH_RECORDS:
+            self.flush()
+
+    def flush(self):
+        self.file.write(memoryview(self.buffer)[:self.buffered * LOG_RECORD.size])
+        self.file.flush()
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class TelemetryRecorder:
+    """Records samples into a ring and, optionally, a log file."""
+
+    def __init__(self, log_path=None, capacity=RING_CAPACITY):
+        self.ring = TelemetryRing(capacity)
+        self.log = TelemetryLog(log_path) if log_path else None
+
+    def record(self, position, speed, timestamp=None):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.ring.append(timestamp, position, speed)
+        if self.log is not None:
+            self.log.write(timestamp, position, speed)
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+
+def read_log(path):
+    """Load a log written by TelemetryLog as (timestamps, positions, speeds) arrays."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version = LOG_HEADER.unpack_from(data, 0)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path} is not a motor telemetry log")
+
+    timestamps = array("d")
+    positions = array("i")
+    speeds = array("i")
+    usable = len(data) - (len(data) - LOG_HEADER.size) % LOG_RECORD.size  # Ignore a torn last record
+    for timestamp, position, speed in LOG_RECORD.iter_unpack(memoryview(data)[LOG_HEADER.size:usable]):
+        timestamps.append(timestamp)
+        positions.append(position)
+        speeds.append(speed)
+    return timestamps, positions, speeds
+
+
+class ReplayMotor:
+    """Plays a telemetry log back through the buildhat.Motor reading API.
+
+    With `realtime=True` samples are picked by wall-clock time since the first read, scaled
+    by `rate`. With `realtime=False` every read returns the next sample, which lets a
+    benchmark push the input path as fast as it can go.
+    """
+
+    def __init__(self, path, realtime=True, rate=1.0, loop=True):
+        self.timestamps, self.positions, self.speeds = read_log(path)
+        if not self.timestamps:
+            raise ValueError(f"{path} contains no samples")
+        self.realtime = realtime
+        self.rate = rate
+        self.loop = loop
+        self.index = 0
+        self.start_time = None
+
+    def _advance(self):
+        count = len(self.timestamps)
+        if not self.realtime:
+            index = self.index
+            self.index = (index + 1) % count if self.loop else min(index + 1, count - 1)
+            return index
+
+        now = time.monotonic()
+        if self.start_time is None:
+            self.start_time = now
+        duration = self.timestamps[-1] - self.timestamps[0]
+        elapsed = (now - self.start_time) * self.rate
+        if self.loop and duration > 0:
+            elapsed %= duration
+        target = self.timestamps[0] + elapsed
+
+        # Samples are time-ordered, so walk forward from the last index (rewinding after a loop)
+        index = self.index
+        if self.timestamps[index] > target:
+            index = 0
+        while index + 1 < count and self.timestamps[index + 1] <= target:
+            index += 1
+        self.index = index
+        return index
+
+    def get(self):
+        index = self._advance()
+        return [self.speeds[index], self.positions[index], absolute_position(self.positions[index])]
+
+    def get_position(self):
+        return self.positions[self._advance()]
+
+    def get_speed(self):
+        return self.speeds[self._advance()]
+
+    def get_aposition(self):
+        return absolute_position(self.positions[self._advance()])
+
+
+def absolute_position(position):
+    """Fold a cumulative position into the -180..180 range buildhat reports as the absolute position."""
+    return (position + 180) % 360 - 180
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, next to the games that import them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Masks and surfaces need pygame initialized, but never a real display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+
+@pytest.fixture
+def frame_counts():
+    """Frame counts of the bundled corgi sheet, so the tests need neither the image nor a cache."""
+    return {"jump": 10, "idle1": 4, "idle2": 4, "sit": 8, "walk": 4, "run": 7, "sniff": 7, "sniff_walk": 7}
@@ -0,0 +1,79 @@
+import pytest
+
+from animation import END, FRAME_DURATION, LOOP, ONCE, PING_PONG, Timeline
+
+
+def play(timeline, state, steps):
+    """Advance `state` from its start one step at a time; returns the frames shown and the events fired."""
+    entry, phase = timeline.start[state], 0.0
+    frames, fired = [], []
+    for _ in range(steps):
+        entry, phase, _, _ = timeline.advance(entry, phase, 1, fired)
+        frames.append(timeline.frame[entry])
+    return frames, fired
+
+
+def test_loop_wraps_to_first_frame():
+    timeline = Timeline({"walk": 3}, animations={})
+    frames, _ = play(timeline, "walk", 7)
+    assert frames == [1, 2, 0, 1, 2, 0, 1]
+    assert timeline.next[timeline.start["walk"] + 2] == timeline.start["walk"]
+
+
+def test_once_holds_last_frame_and_finishes():
+    timeline = Timeline({"jump": 3}, animations={"jump": {"mode": ONCE}})
+    start = timeline.start["jump"]
+    assert timeline.next[start + 2] == END
+    entry, phase, _, finished = timeline.advance(start, 0.0, 2, [])
+    assert (timeline.frame[entry], finished) == (2, False)
+    entry, phase, _, finished = timeline.advance(entry, phase, 5, [])
+    assert (timeline.frame[entry], finished) == (2, True)
+
+
+def test_ping_pong_unrolls_there_and_back():
+    timeline = Timeline({"sniff": 4}, animations={"sniff": {"mode": PING_PONG}})
+    assert timeline.length["sniff"] == 6
+    frames, _ = play(timeline, "sniff", 8)
+    assert frames == [1, 2, 3, 2, 1, 0, 1, 2]
+
+
+def test_durations_and_events():
+    animations = {"jump": {"mode": ONCE, "durations": (100, 200, 100), "events": {1: "takeoff", 2: "land"}}}
+    timeline = Timeline({"jump": 3}, steps_per_frame=2, animations=animations)
+    assert timeline.duration[timeline.start["jump"]:] == (2.0, 4.0, 2.0)
+    frames, fired = play(timeline, "jump", 8)
+    assert frames == [0, 1, 1, 1, 1, 2, 2, 2]
+    assert fired == ["takeoff", "land"]
+
+
+def test_root_motion_spreads_over_the_frame():
+    animations = {"jump": {"mode": ONCE, "root_motion": (0, 30)}}
+    timeline = Timeline({"jump": 2}, steps_per_frame=3, animations=animations)
+    entry, phase, motion, _ = timeline.advance(timeline.start["jump"], 0.0, 4, [])
+    assert motion == pytest.approx(10)
+    _, _, motion, finished = timeline.advance(entry, phase, 10, [])
+    assert motion == pytest.approx(20)
+    assert finished
+
+
+def test_default_frames_last_frame_duration():
+    timeline = Timeline({"sit": 2}, steps_per_frame=6, animations={})
+    assert timeline.duration == (6.0, 6.0)
+    assert FRAME_DURATION == 100  # The arcade games' TEXTURE_STEPS assume it
+
+
+@pytest.mark.parametrize("animation", [
+    {"durations": (100,)},
+    {"root_motion": (0, 0, 0)},
+    {"durations": (100, 0)},
+    {"mode": "shuffle"},
+])
+def test_invalid_animations_are_rejected(animation):
+    with pytest.raises(ValueError):
+        Timeline({"walk": 2}, animations={"walk": animation})
+
+
+def test_loop_is_the_default_mode():
+    explicit = Timeline({"walk": 3}, animations={"walk": {"mode": LOOP}})
+    implicit = Timeline({"walk": 3}, animations={})
+    assert explicit.next == implicit.next
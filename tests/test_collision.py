@@ -0,0 +1,129 @@
+import pygame
+import pytest
+
+from collision import JUMPABLE, OBSTACLE, PICKUP, Scene, SceneObject, SpatialHash
+from dog_core import Dog
+
+
+def solid(width, height):
+    surface = pygame.Surface((width, height), pygame.SRCALPHA)
+    surface.fill((255, 255, 255, 255))
+    return surface
+
+
+class BoxSprite:
+    """The parts of pygame_demo.DogSprite that Scene.resolve uses, for a fully solid 40x40 dog."""
+
+    def __init__(self, dog, y=100):
+        self.dog = dog
+        self.rect = pygame.Rect(int(dog.x), y, 40, 40)
+        self.mask = pygame.mask.Mask((40, 40), fill=True)
+        self.hitbox = pygame.Rect(0, 0, 40, 40)
+
+    def place_hitbox(self, x, y):
+        self.hitbox.topleft = (x, y)
+        return self.hitbox
+
+
+def test_spatial_hash_files_items_in_every_covered_cell():
+    grid = SpatialHash(cell_size=100)
+    grid.insert("wide", pygame.Rect(50, 0, 200, 10))
+    grid.insert("small", pygame.Rect(310, 0, 10, 10))
+    assert len(grid) == 2
+    assert set(grid.cells) == {(0, 0), (1, 0), (2, 0), (3, 0)}
+    assert grid.query(pygame.Rect(220, 5, 5, 5)) == ["wide"]
+    assert grid.query(pygame.Rect(0, 0, 400, 10)) == ["wide", "small"]
+    assert grid.query(pygame.Rect(0, 500, 400, 10)) == []
+
+
+def test_spatial_hash_remove_empties_cells():
+    grid = SpatialHash(cell_size=100)
+    grid.insert("a", pygame.Rect(0, 0, 150, 10))
+    grid.insert("b", pygame.Rect(120, 0, 10, 10))
+    grid.remove("a")
+    assert len(grid) == 1
+    assert set(grid.cells) == {(1, 0)}
+    assert grid.query(pygame.Rect(0, 0, 300, 10)) == ["b"]
+    with pytest.raises(KeyError):
+        grid.remove("a")
+
+
+def test_rects_on_cell_edges():
+    grid = SpatialHash(cell_size=100)
+    grid.insert("edge", pygame.Rect(0, 0, 100, 100))  # right and bottom are exclusive
+    assert set(grid.cells) == {(0, 0)}
+    assert grid.query(pygame.Rect(100, 0, 10, 10)) == []
+
+
+def test_collide_tests_pixels_not_just_boxes():
+    ring = pygame.Surface((30, 30), pygame.SRCALPHA)
+    pygame.draw.rect(ring, (255, 255, 255, 255), ring.get_rect(), 2)
+    scene = Scene([SceneObject("ring", OBSTACLE, ring, 100, 100)])
+    inside = pygame.mask.Mask((6, 6), fill=True)
+    assert scene.collide(pygame.Rect(112, 112, 6, 6), inside, 112, 112) == []
+    assert len(scene.collide(pygame.Rect(99, 110, 6, 6), inside, 99, 110)) == 1
+
+
+def test_obstacle_blocks_a_walk(frame_counts):
+    scene = Scene([SceneObject("gate", OBSTACLE, solid(20, 60), 200, 90)])
+    dog = Dog(frame_counts, 100, 40, 1000)
+    sprite = BoxSprite(dog)
+    dog.walk_steady("right", 7)
+    for _ in range(50):
+        dog.step()
+        scene.resolve(sprite)
+    assert dog.x + 40 <= 200 + 7
+    assert dog.x > 150
+    assert not dog.is_walking
+
+
+def test_jumpable_blocks_only_on_the_ground(frame_counts):
+    bench = SceneObject("bench", JUMPABLE, solid(20, 60), 145, 90)
+    scene = Scene([bench])
+    dog = Dog(frame_counts, 100, 40, 1000)
+    sprite = BoxSprite(dog)
+    dog.walk_steady("right", 6)
+    dog.step()
+    scene.resolve(sprite)
+    assert dog.x == dog.prev_x and not dog.is_walking
+
+    # The wind-up frames still stand on the ground
+    dog.jump()
+    dog.walk_steady("right", 6)
+    dog.step()
+    scene.resolve(sprite)
+    assert not dog.is_airborne and dog.x == dog.prev_x
+
+    while not dog.is_airborne:
+        dog.step()
+    dog.prev_x = dog.x - 6
+    scene.resolve(sprite)
+    assert dog.x > dog.prev_x
+
+
+def test_dog_can_walk_off_an_object_it_overlaps(frame_counts):
+    scene = Scene([SceneObject("gate", OBSTACLE, solid(20, 60), 120, 90)])
+    dog = Dog(frame_counts, 110, 40, 1000)
+    sprite = BoxSprite(dog)
+    dog.walk_steady("left", 5)
+    dog.step()
+    scene.resolve(sprite)
+    assert dog.x == 105 and dog.is_walking
+
+
+def test_pickups_are_collected_once(frame_counts):
+    bone = SceneObject("bone", PICKUP, solid(10, 10), 130, 110)
+    scene = Scene([bone])
+    dog = Dog(frame_counts, 100, 40, 1000)
+    sprite = BoxSprite(dog)
+    assert scene.resolve(sprite) == [bone]
+    assert len(scene) == 0
+    assert scene.resolve(sprite) == []
+
+
+def test_visible_queries_the_camera_view():
+    near = SceneObject("near", PICKUP, solid(10, 10), 100, 100)
+    far = SceneObject("far", PICKUP, solid(10, 10), 3000, 100)
+    scene = Scene([near, far])
+    assert scene.visible(0, 1024, 576) == [near]
+    assert scene.visible(2500, 1024, 576) == [far]
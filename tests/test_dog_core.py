@@ -0,0 +1,154 @@
+import pytest
+
+import animation
+from animation import JUMP_AIRBORNE, JUMP_MOVE_X, Timeline
+from dog_core import STEERING_DISTANCE, Dog
+from locomotion import LocomotionController
+
+STEPS_PER_FRAME = 5  # As pygame_demo plays them: every authored duration is a whole number of steps
+
+
+def make_dog(frame_counts, x=100.0, steps_per_frame=STEPS_PER_FRAME):
+    return Dog(frame_counts, x, 50, 1000, steps_per_frame=steps_per_frame)
+
+
+def test_starts_sitting(frame_counts):
+    dog = make_dog(frame_counts)
+    assert (dog.current_state, dog.current_frame, dog.is_walking, dog.is_jumping) == ("sit", 0, False, False)
+
+
+def test_jump_plays_every_frame_then_sits(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.jump()
+    frames, events, airborne = [], [], []
+    while dog.is_jumping:
+        dog.step()
+        frames.append(dog.current_frame)
+        events.extend(dog.events)
+        airborne.append(dog.is_airborne)
+    assert sorted(set(frames)) == list(range(frame_counts["jump"]))
+    assert events == ["takeoff", "land"]
+    assert any(airborne) and not airborne[-1]
+    assert dog.current_state == "sit"
+    assert dog.x == pytest.approx(100 + JUMP_MOVE_X)
+
+
+def test_jump_frames_follow_authored_durations(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.jump()
+    shown = {}
+    while dog.is_jumping:
+        shown[dog.current_frame] = shown.get(dog.current_frame, 0) + 1
+        dog.step()
+    durations = animation.ANIMATIONS["jump"]["durations"]
+    assert [shown[frame] for frame in range(frame_counts["jump"])] == [
+        duration * STEPS_PER_FRAME // animation.FRAME_DURATION for duration in durations]
+
+
+def test_airborne_between_takeoff_and_land(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.jump()
+    while dog.is_jumping:
+        dog.step()
+        if dog.is_jumping:
+            assert dog.is_airborne == (dog.current_frame in JUMP_AIRBORNE)
+
+
+def test_jump_faces_its_direction(frame_counts):
+    dog = make_dog(frame_counts, x=500)
+    dog.facing_right = False
+    dog.jump()
+    while dog.is_jumping:
+        dog.step()
+    assert dog.x == pytest.approx(500 - JUMP_MOVE_X)
+
+
+def test_input_does_not_cut_a_jump_short(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.jump()
+    dog.step()
+    dog.sit()
+    dog.walk("right", 0.5)
+    dog.jump()
+    assert dog.current_state == "jump" and dog.is_jumping
+
+
+def test_walk_picks_gait_and_stops_at_target(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.walk("right", 0.5)
+    assert dog.current_state == "walk" and dog.is_walking
+    assert dog.target_x == pytest.approx(100 + 0.5 * STEERING_DISTANCE)
+    for _ in range(1000):
+        dog.step()
+        if not dog.is_walking:
+            break
+    assert dog.x == pytest.approx(100 + 0.5 * STEERING_DISTANCE)
+    assert dog.current_state == "sit"
+
+
+def test_walk_left_and_bounds(frame_counts):
+    dog = make_dog(frame_counts, x=20)
+    dog.walk("left", 1.0)
+    assert not dog.facing_right and dog.target_x == 0
+    for _ in range(100):
+        dog.step()
+    assert dog.x == 0
+
+
+def test_small_steering_sits(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.walk("right", 0.5)
+    dog.walk("right", 0.05)
+    assert dog.current_state == "sit" and not dog.is_walking
+
+
+def test_returning_wheel_does_not_boost_gait(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.walk("right", 0.3, -2.0)
+    assert dog.current_state == "sniff_walk"
+    dog.walk("right", 0.3, 2.0)
+    assert dog.current_state != "sniff_walk"
+
+
+def test_sit_keeps_a_sitting_animation_running(frame_counts):
+    dog = make_dog(frame_counts, steps_per_frame=1)
+    dog.step()
+    dog.step()
+    dog.sit()
+    assert dog.current_frame == 2
+
+
+def test_walk_steady_uses_given_speed(frame_counts):
+    dog = make_dog(frame_counts)
+    dog.walk_steady("left", 3)
+    dog.step()
+    assert dog.x == pytest.approx(97)
+    assert dog.current_state == "walk" and dog.target_x is None
+
+
+def test_first_frame_event_fires_on_entry_and_each_loop(frame_counts):
+    animations = {"walk": {"events": {0: "paw"}}}
+    dog = Dog(frame_counts, 100, 50, 1000, LocomotionController())
+    dog.timeline = Timeline(frame_counts, animations=animations)
+    dog.set_state("walk")
+    fired = []
+    for _ in range(frame_counts["walk"] * 2):
+        dog.step()
+        fired.append(list(dog.events))
+    # Once on entry, then on every wrap back to frame 0; the first step already moves on to frame 1
+    count = frame_counts["walk"]
+    assert [index for index, events in enumerate(fired) if events] == [0, count - 1, 2 * count - 1]
+    assert fired[0] == ["paw"]
+
+
+def test_turning_mid_jump_keeps_its_direction(frame_counts):
+    dog = make_dog(frame_counts, x=500)
+    dog.jump()
+    for _ in range(20):
+        dog.step()
+    dog.walk("left", 0.5)
+    dog.walk_steady("left", 3)
+    assert dog.facing_right
+    while dog.is_jumping:
+        dog.step()
+    assert dog.x == pytest.approx(500 + JUMP_MOVE_X)
@@ -0,0 +1,44 @@
+from game_clock import FixedTimestepClock, lerp
+
+# Steps and times are powers of two, so the accumulator stays exact
+
+
+def test_steps_and_alpha():
+    clock = FixedTimestepClock(0.25)
+    assert clock.advance(0.125) == 0
+    assert clock.alpha == 0.5
+    assert clock.advance(0.25) == 1
+    assert clock.alpha == 0.5
+    assert clock.advance(0.625) == 3
+    assert clock.alpha == 0.0
+    assert clock.total_steps == 4
+
+
+def test_catch_up_is_capped_and_the_backlog_dropped():
+    clock = FixedTimestepClock(0.25, max_steps=3)
+    assert clock.advance(2.125) == 3
+    assert clock.dropped_time == 1.25
+    assert clock.alpha == 0.5
+    # The next frame starts from the leftover fraction, not the dropped backlog
+    assert clock.advance(0.125) == 1
+    assert clock.alpha == 0.0
+
+
+def test_run_updates_calls_each_due_step():
+    clock = FixedTimestepClock(0.25)
+    calls = []
+    assert clock.run_updates(lambda: calls.append(None), 0.625) == 2
+    assert len(calls) == 2
+    assert clock.update_time > 0
+
+
+def test_run_render_passes_alpha():
+    clock = FixedTimestepClock(0.25)
+    clock.advance(0.0625)
+    drawn = []
+    clock.run_render(drawn.append)
+    assert drawn == [0.25]
+
+
+def test_lerp():
+    assert lerp(10, 20, 0.25) == 12.5
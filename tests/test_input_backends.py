@@ -0,0 +1,43 @@
+from build_hat_controller import HatController, MotorSampler
+from input_backends import MotorInput, steering_state
+
+
+class StillMotor:
+    def get_position(self):
+        return 0
+
+    def get(self):
+        return [0, 0, 0]
+
+
+def sample(position):
+    sampler = MotorSampler('A')
+    sampler.zero(0)
+    sampler.process_sample(0.0, position)
+    return sampler.latest[0]
+
+
+def test_wheel_resting_inside_the_deadzone_has_no_direction():
+    state = sample(6)
+    assert state["steering"] == 0.0
+    assert state["direction"] is None
+    assert not state["left"] and not state["right"]
+
+
+def test_turned_wheel_reports_direction():
+    assert sample(-40)["direction"] == "left"
+    assert sample(40)["direction"] == "right"
+
+
+def test_keyboard_state_direction():
+    assert steering_state(0.0, True)["direction"] is None
+    assert steering_state(-0.5, True)["direction"] == "left"
+
+
+def test_motor_input_stops_once():
+    controller = HatController({'A': StillMotor()})
+    motor_input = MotorInput(controller)
+    motor_input.start()
+    motor_input.stop()
+    motor_input.stop()
+    assert not controller.samplers and not controller.running
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from sensor_bus import STALE_AFTER, BusMotor, SensorBusReader, SensorBusWriter
+
+CAPACITY = 8
+
+
+@pytest.fixture
+def bus(tmp_path):
+    writer = SensorBusWriter(str(tmp_path / "bus"), capacity=CAPACITY)
+    writer.set_rate("A", 100)
+    reader = SensorBusReader(writer.path)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def publish(writer, port, count, start=0, timestamp=None):
+    now = time.monotonic() if timestamp is None else timestamp
+    for index in range(start, start + count):
+        writer.publish(port, now, index, -index)
+
+
+def test_empty_port(bus):
+    _, reader = bus
+    assert reader.latest("A") is None
+    assert reader.history("A") == []
+    assert reader.rate_hz("A") == 100
+    assert reader.rate_hz("B") == 0
+
+
+def test_latest_after_wrapping(bus):
+    writer, reader = bus
+    publish(writer, "A", CAPACITY * 3 + 2)
+    count, _, position, speed = reader.latest("A")
+    assert (count, position, speed) == (CAPACITY * 3 + 2, CAPACITY * 3 + 1, -(CAPACITY * 3 + 1))
+
+
+def test_history_is_oldest_first_before_and_after_a_lap(bus):
+    writer, reader = bus
+    publish(writer, "A", 3)
+    assert [position for _, position, _ in reader.history("A")] == [0, 1, 2]
+    publish(writer, "A", CAPACITY * 2, start=3)
+    newest = CAPACITY * 2 + 3
+    # The slot after the newest sample may be mid-write, so one less than the capacity is readable
+    assert [position for _, position, _ in reader.history("A")] == list(range(newest - CAPACITY + 1, newest))
+    assert [position for _, position, _ in reader.history("A", limit=2)] == [newest - 2, newest - 1]
+
+
+def test_ports_have_separate_rings(bus):
+    writer, reader = bus
+    writer.set_rate("C", 50)
+    publish(writer, "A", 2)
+    publish(writer, "C", 5, start=100)
+    assert reader.latest("A")[2] == 1
+    assert reader.latest("C")[2] == 104
+    assert reader.latest("B") is None
+
+
+def test_samples_keep_the_daemon_alive(bus):
+    writer, reader = bus
+    publish(writer, "A", 1, timestamp=time.monotonic() - STALE_AFTER * 2)
+    assert not reader.alive()
+    assert SensorBusReader.attach(writer.path) is None
+    publish(writer, "A", 1)
+    assert reader.alive()
+
+
+def test_bus_motor_reads_the_newest_sample(bus):
+    writer, reader = bus
+    publish(writer, "A", 4)
+    motor = BusMotor(reader, "A")
+    assert motor.get() == [-3, 3, 3]
+    assert motor.get_position() == 3 and motor.get_speed() == -3
+
+
+def test_bus_motor_raises_once_the_daemon_is_gone(bus):
+    writer, reader = bus
+    publish(writer, "A", 4, timestamp=time.monotonic() - STALE_AFTER * 2)
+    with pytest.raises(RuntimeError):
+        BusMotor(reader, "A").get()
+
+
+def test_bus_motor_raises_for_a_port_that_stopped(bus):
+    writer, reader = bus
+    writer.set_rate("B", 100)
+    publish(writer, "B", 1, timestamp=time.monotonic() - STALE_AFTER * 2)
+    publish(writer, "A", 1)
+    assert reader.alive()
+    with pytest.raises(RuntimeError):
+        BusMotor(reader, "B").get()
+
+
+def test_bus_motor_rejects_an_unpublished_port(bus):
+    writer, reader = bus
+    publish(writer, "A", 1)
+    with pytest.raises(RuntimeError):
+        BusMotor(reader, "D").get_position()
+
+
+def test_only_one_live_daemon_per_bus(bus):
+    writer, _ = bus
+    publish(writer, "A", 1)
+    with pytest.raises(RuntimeError):
+        SensorBusWriter(writer.path, capacity=CAPACITY)
@@ -0,0 +1,67 @@
+import pytest
+
+from telemetry import (LOG_FLUSH_RECORDS, LOG_HEADER, LOG_RECORD, ReplayMotor, TelemetryLog, TelemetryRing,
+                       absolute_position, read_log)
+
+SAMPLES = [(0.02 * index, index * 3 - 50, index % 7 - 3) for index in range(LOG_FLUSH_RECORDS + 10)]
+
+
+def write_log(path, samples=SAMPLES):
+    log = TelemetryLog(path)
+    for sample in samples:
+        log.write(*sample)
+    log.close()
+
+
+def test_log_round_trip(tmp_path):
+    path = tmp_path / "session.mtlg"
+    write_log(path)
+    timestamps, positions, speeds = read_log(path)
+    assert list(zip(timestamps, positions, speeds)) == SAMPLES
+    assert path.stat().st_size == LOG_HEADER.size + len(SAMPLES) * LOG_RECORD.size
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    path = tmp_path / "session.mtlg"
+    write_log(path)
+    with open(path, "ab") as f:
+        f.write(LOG_RECORD.pack(99.0, 1, 2)[:5])
+    assert len(read_log(path)[0]) == len(SAMPLES)
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"PNG!" + bytes(20))
+    with pytest.raises(ValueError):
+        read_log(path)
+
+
+def test_replay_returns_samples_in_order(tmp_path):
+    path = tmp_path / "session.mtlg"
+    write_log(path, SAMPLES[:3])
+    motor = ReplayMotor(path, realtime=False)
+    assert [motor.get_position() for _ in range(4)] == [-50, -47, -44, -50]
+    motor = ReplayMotor(path, realtime=False, loop=False)
+    assert [motor.get()[0] for _ in range(4)] == [-3, -2, -1, -1]
+
+
+def test_replay_of_an_empty_log(tmp_path):
+    path = tmp_path / "empty.mtlg"
+    write_log(path, [])
+    with pytest.raises(ValueError):
+        ReplayMotor(path)
+
+
+def test_ring_keeps_the_newest_samples():
+    ring = TelemetryRing(capacity=4)
+    for sample in SAMPLES[:6]:
+        ring.append(*sample)
+    assert ring.count == 4
+    assert ring.latest() == SAMPLES[5]
+    timestamps, positions, speeds = ring.snapshot()
+    assert list(zip(timestamps, positions, speeds)) == SAMPLES[2:6]
+
+
+@pytest.mark.parametrize("position, folded", [(0, 0), (179, 179), (180, -180), (-181, 179), (725, 5)])
+def test_absolute_position(position, folded):
+    assert absolute_position(position) == folded
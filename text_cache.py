@@ -0,0 +1,37 @@
+from collections import OrderedDict
+
+MAX_ENTRIES = 64
+
+
+class TextCache:
+    """Keeps rendered text surfaces so a label is only rasterized again when its text changes.
+
+    Least recently used entries are evicted once more than `max_entries` are held, which
+    bounds memory for labels that show a changing number. Pass `convert=False` when no
+    display mode is set (e.g. when drawing through SDL2 textures).
+    """
+
+    def __init__(self, font, max_entries=MAX_ENTRIES, convert=True):
+        self.font = font
+        self.convert = convert
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, color, antialias=True):
+        key = (text, color, antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font.render(text, antialias, color)
+        if self.convert:
+            surface = surface.convert_alpha()
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
@@ -0,0 +1,166 @@
+"""Side-scrolling world: a camera plus parallax layers streamed in as fixed-width chunks."""
+from collections import OrderedDict
+
+import pygame
+
+from profiler import PROFILER
+
+CHUNK_WIDTH = 128  # Width of a streamed chunk in screen pixels
+PREFETCH_MARGIN = CHUNK_WIDTH  # Build chunks this far beyond the viewport edges
+PREFETCH_PER_FRAME = 1  # Chunks built ahead of need per frame, to spread the cost
+MEMORY_BUDGET = 24 * 1024 * 1024  # Bytes of decoded and converted surfaces kept resident
+CAMERA_LEAD = 0.4  # Where the followed point sits across the screen, as a fraction of its width
+
+
+class ChunkCache:
+    """LRU cache of surfaces with a byte budget instead of an entry count."""
+
+    def __init__(self, budget=MEMORY_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.last_used = {}  # Key -> frame it was last requested in
+        self.frame = 0
+        self.resident_bytes = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def begin_frame(self):
+        self.frame += 1
+
+    def has_room(self):
+        return self.resident_bytes < self.budget
+
+    def get(self, key, build):
+        self.last_used[key] = self.frame
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            return surface
+        with PROFILER.scope("chunk_build"):
+            surface = build()
+        self.builds += 1
+        self.entries[key] = surface
+        self.resident_bytes += surface_bytes(surface)
+        self._evict()
+        return surface
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _evict(self):
+        # Entries used this frame are never evicted, otherwise a budget smaller than the
+        # visible set would rebuild the same chunks over and over; the budget is exceeded instead
+        while self.resident_bytes > self.budget and self.entries:
+            key, surface = next(iter(self.entries.items()))
+            if self.last_used[key] == self.frame:
+                break
+            del self.entries[key]
+            del self.last_used[key]
+            self.resident_bytes -= surface_bytes(surface)
+            self.evictions += 1
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+class ParallaxLayer:
+    """A horizontally repeating strip of `image_path` scrolled at `factor` times the camera speed.
+
+    `source_top` and `source_height` pick the strip out of the image as fractions of its height;
+    it is drawn at `y` scaled to `height` screen pixels.
+    """
+
+    def __init__(self, name, image_path, factor, y, height, source_top=0.0, source_height=1.0, alpha=False):
+        self.name = name
+        self.image_path = image_path
+        self.factor = factor
+        self.y = y
+        self.height = height
+        self.source_top = source_top
+        self.source_height = source_height
+        self.alpha = alpha
+        self.scale = None
+        self.loop_chunks = None  # Chunks before the layer repeats
+
+    def source(self, cache):
+        # Decoded lazily and held in the same budgeted cache as the chunks built from it
+        return cache.get(("source", self.image_path), lambda: pygame.image.load(self.image_path))
+
+    def prepare(self, cache):
+        if self.scale is not None:
+            return
+        image = self.source(cache)
+        strip_height = image.get_height() * self.source_height
+        self.scale = self.height / strip_height
+        # Round the repeat length to whole chunks so no chunk straddles the seam
+        self.loop_chunks = max(1, round(image.get_width() * self.scale / CHUNK_WIDTH))
+
+    def build_chunk(self, cache, index):
+        image = self.source(cache)
+        loop_index = index % self.loop_chunks
+        source_chunk_width = image.get_width() / self.loop_chunks
+        source_rect = pygame.Rect(
+            int(loop_index * source_chunk_width),
+            int(image.get_height() * self.source_top),
+            int((loop_index + 1) * source_chunk_width) - int(loop_index * source_chunk_width),
+            int(image.get_height() * self.source_height),
+        )
+        chunk = pygame.transform.scale(image.subsurface(source_rect), (CHUNK_WIDTH, self.height))
+        return chunk.convert_alpha() if self.alpha else chunk.convert()
+
+    def chunk(self, cache, index):
+        return cache.get((self.name, index % self.loop_chunks), lambda: self.build_chunk(cache, index))
+
+    def chunk_range(self, camera_x, view_width, margin=0):
+        offset = camera_x * self.factor
+        first = int((offset - margin) // CHUNK_WIDTH)
+        last = int((offset + view_width + margin) // CHUNK_WIDTH)
+        return offset, first, last
+
+
+class Camera:
+    def __init__(self, view_width, world_width):
+        self.view_width = view_width
+        self.world_width = world_width
+        self.x = 0.0
+
+    def follow(self, target_x):
+        self.x = max(0.0, min(target_x - self.view_width * CAMERA_LEAD, self.world_width - self.view_width))
+        return self.x
+
+
+class World:
+    def __init__(self, layers, view_width, world_width, budget=MEMORY_BUDGET):
+        self.layers = layers
+        self.view_width = view_width
+        self.width = world_width
+        self.camera = Camera(view_width, world_width)
+        self.cache = ChunkCache(budget)
+
+    def draw(self, surface):
+        camera_x = self.camera.x
+        self.cache.begin_frame()
+        for layer in self.layers:
+            layer.prepare(self.cache)
+            offset, first, last = layer.chunk_range(camera_x, self.view_width)
+            blits = [
+                (layer.chunk(self.cache, index), (index * CHUNK_WIDTH - int(offset), layer.y))
+                for index in range(first, last + 1)
+            ]
+            surface.blits(blits, doreturn=False)
+        self.prefetch()
+
+    def prefetch(self):
+        """Build a few not-yet-visible chunks just outside the viewport ahead of need."""
+        budget = PREFETCH_PER_FRAME
+        if not self.cache.has_room():
+            return
+        for layer in self.layers:
+            offset, first, last = layer.chunk_range(self.camera.x, self.view_width, PREFETCH_MARGIN)
+            for index in range(first, last + 1):
+                if (layer.name, index % layer.loop_chunks) not in self.cache:
+                    layer.chunk(self.cache, index)
+                    budget -= 1
+                    if budget == 0:
+                        return